@@ -0,0 +1,159 @@
+"""Process pool that runs AI searches off the asyncio event loop"""
+import asyncio
+import functools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from morris import game_from_dict
+from opening_book import get_opening_book
+from tablebase import get_tablebase
+from three_mens_morris import analyze_positions
+
+
+def _init_worker():
+    # Load the tablebase and opening book once per worker instead of on its first search
+    get_tablebase()
+    get_opening_book()
+
+
+def _search_in_worker(state):
+    game = game_from_dict(state)
+    stats = {}
+    move = game.get_ai_move(stats=stats)
+    return move, stats
+
+
+class AIMovePool:
+    """Dispatches get_ai_move to worker processes, shipping the game via to_dict.
+
+    When more than `max_pending` searches are already queued, or a search
+    takes longer than `timeout` seconds, the move is computed inline with a
+    `fallback_depth` search (or `fallback_iterations` MCTS leaves) instead.
+    `workers=0` disables the pool entirely.
+    Games searching at least `root_search.min_depth` deep are instead split
+    by root move across the ParallelRootSearch's own workers.
+    MCTS keeps a game's subtrees in the TreeCache of the process that searched
+    it, so given a `game_id` an MCTS game is always searched by the same one of
+    `workers` single-process executors, chosen by hash(game_id).
+    """
+
+    def __init__(self, workers=None, max_pending=64, timeout=6.0, fallback_depth=1, fallback_iterations=16,
+                 root_search=None):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.fallback_depth = fallback_depth
+        self.fallback_iterations = fallback_iterations
+        self.root_search = root_search
+        self.pending = 0
+        self.fallbacks = 0
+        self._executor = None
+        self._mcts_executors = {}
+
+    def _get_executor(self, engine='minimax', game_id=None):
+        # Created on first use so importing the app never forks
+        if engine == 'mcts' and game_id is not None:
+            slot = hash(game_id) % (self.workers or os.cpu_count() or 1)
+            executor = self._mcts_executors.get(slot)
+            if executor is None:
+                executor = self._mcts_executors[slot] = ProcessPoolExecutor(max_workers=1, initializer=_init_worker)
+            return executor
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker)
+        return self._executor
+
+    def _discard(self, executor):
+        """Forget a broken executor so the next search starts a fresh one"""
+        if executor is self._executor:
+            self._executor = None
+        for slot, mcts_executor in list(self._mcts_executors.items()):
+            if mcts_executor is executor:
+                del self._mcts_executors[slot]
+
+    async def _fallback_move(self, game, stats):
+        # Searched on a copy in a thread, so the event loop keeps serving other games meanwhile
+        self.fallbacks += 1
+        copy = game_from_dict(game.to_dict())
+        move = await asyncio.get_running_loop().run_in_executor(None, functools.partial(
+            copy.get_ai_move, depth=min(self.fallback_depth, game.search_depth), time_budget=0, stats=stats,
+            iterations=self.fallback_iterations))
+        if stats is not None:
+            stats['source'] = 'fallback'
+        return move
+
+    def _run(self, executor, function, *args):
+        """Run `function` in `executor`, holding a pending slot until the job itself finishes.
+
+        The result is shielded, so a caller that gives up on it at its
+        timeout does not release the slot of a job still using a worker.
+        """
+        future = asyncio.get_running_loop().run_in_executor(executor, function, *args)
+        self.pending += 1
+        future.add_done_callback(self._release)
+        return asyncio.shield(future)
+
+    def _release(self, future):
+        self.pending -= 1
+
+    async def get_ai_move(self, game, stats=None, game_id=None):
+        """Best AI move for `game` without blocking the event loop.
+
+        `stats` is filled as by ThreeMensMorris.get_ai_move, with source
+        'fallback' when the pool was saturated or timed out.
+        """
+        if self.workers == 0:
+            return game.get_ai_move(stats=stats, root_search=self.root_search)
+        if self.pending >= self.max_pending:
+            return await self._fallback_move(game, stats)
+
+        executor = None
+        try:
+            if self.root_search is not None and game.engine == 'minimax' and \
+               game.search_depth >= self.root_search.min_depth:
+                # The root search fans out to its own processes from a thread here,
+                # on a copy so a timed-out search never sees the game move on
+                copy = game_from_dict(game.to_dict())
+                worker_stats = {}
+                future = self._run(None, functools.partial(
+                    copy.get_ai_move, stats=worker_stats, root_search=self.root_search))
+                move = await asyncio.wait_for(future, self.timeout)
+            else:
+                executor = self._get_executor(game.engine, game_id)
+                future = self._run(executor, _search_in_worker, game.to_dict())
+                move, worker_stats = await asyncio.wait_for(future, self.timeout)
+            if stats is not None:
+                stats.update(worker_stats)
+            return move
+        except asyncio.TimeoutError:
+            return await self._fallback_move(game, stats)
+        except BrokenProcessPool:
+            # A worker died; start a fresh pool for the next request
+            self._discard(executor)
+            return await self._fallback_move(game, stats)
+
+    async def search(self, state, game_id=None):
+        """(move, stats) for a to_dict game state, with no fallback and no queue limit"""
+        loop = asyncio.get_running_loop()
+        executor = None if self.workers == 0 else self._get_executor(state.get('engine'), game_id)
+        return await loop.run_in_executor(executor, _search_in_worker, state)
+
+    async def analyze(self, states, depth=None, max_depth=None):
+        """analyze_positions over the pool's workers, waited on from a thread"""
+        executor = None if self.workers == 0 else self._get_executor()
+        workers = 0 if self.workers == 0 else None
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None, functools.partial(analyze_positions, states, depth=depth, workers=workers, executor=executor,
+                                    max_depth=max_depth)
+        )
+
+    def shutdown(self):
+        if self.root_search is not None:
+            self.root_search.shutdown()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        for executor in self._mcts_executors.values():
+            executor.shutdown(wait=False, cancel_futures=True)
+        self._mcts_executors.clear()
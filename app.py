@@ -1,24 +1,159 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, WebSocket, WebSocketDisconnect
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, PlainTextResponse, Response
 from pydantic import BaseModel
-from typing import Dict, Optional
+from typing import List, Optional
+import json
+import os
+import time
 import uuid
 from three_mens_morris import ThreeMensMorris
+from morris import create_game
+from rules import RULES, VARIANTS
+from tablebase import get_tablebase
+from opening_book import get_opening_book
+from ai_pool import AIMovePool
+from parallel_search import ParallelRootSearch
+from ponder import Ponderer
+from session_store import create_session_store
+from game_log import GameLog
+from wire import CHARS, compact_state, dumps
+from metrics import COUNT_BUCKETS, DEPTH_BUCKETS, Registry
 
 app = FastAPI(title="Three Men's Morris Game", version="1.0.0")
 
-# In-memory storage for game sessions
-games: Dict[str, ThreeMensMorris] = {}
+# Load the perfect-play tablebase and the opening book once at startup rather
+# than on the first AI move
+get_tablebase()
+get_opening_book()
+
+# Upper bound on the per-move AI time budget a client may request
+MAX_TIME_BUDGET = 5.0
+# Limits for /api/analyze requests
+MAX_ANALYZE_BATCH = 10_000
+MAX_ANALYZE_DEPTH = 8
+
+# Master-level searches can split their root moves over AI_ROOT_WORKERS extra
+# processes sharing a transposition table (0, the default, keeps them in the pool)
+root_workers = int(os.environ.get("AI_ROOT_WORKERS", 0))
+root_search = ParallelRootSearch(
+    workers=root_workers, min_depth=ThreeMensMorris.difficulty_depths['master']
+) if root_workers > 0 else None
+
+# AI searches run in worker processes so one expert search never blocks other
+# requests; AI_POOL_WORKERS=0 runs them inline instead
+ai_pool = AIMovePool(
+    workers=int(os.environ.get("AI_POOL_WORKERS", os.cpu_count() or 1)),
+    max_pending=int(os.environ.get("AI_POOL_MAX_PENDING", 64)),
+    timeout=float(os.environ.get("AI_MOVE_TIMEOUT", MAX_TIME_BUDGET + 1)),
+    root_search=root_search,
+)
+
+# Opt-in pondering: AI_PONDER_BUDGET seconds of search per human turn are spent
+# precomputing the AI's reply to each human move (0 disables it). It uses at most
+# half the pool's workers and pauses whenever real searches are queued.
+ponderer = Ponderer(
+    ai_pool,
+    budget=float(os.environ.get("AI_PONDER_BUDGET", 0)),
+    max_concurrent=max(1, ai_pool.workers // 2),
+    max_games=int(os.environ.get("SESSION_MAX", 10_000)),
+)
+
+# Every finished game, and every game deleted or evicted unfinished, is appended
+# to the binary log at GAME_LOG_PATH (an empty value disables it); see game_log.py
+game_log_path = os.environ.get("GAME_LOG_PATH", "games.log")
+game_log = GameLog(game_log_path) if game_log_path else None
+
+def log_unfinished(game_id: str, game: ThreeMensMorris):
+    """Append a game that is being dropped before it ended, if any move was played"""
+    if game.history and not game.is_game_over()[0]:
+        game_log.append_game(game_id, game)
+
+# Game sessions: SESSION_STORE=memory keeps them in this process, while
+# SESSION_STORE=sqlite shares them between gunicorn workers through SESSION_DB_PATH.
+# Sessions idle for SESSION_TTL seconds are evicted.
+if os.environ.get("SESSION_STORE", "memory") == "sqlite":
+    sessions = create_session_store(
+        "sqlite",
+        path=os.environ.get("SESSION_DB_PATH", "sessions.db"),
+        ttl=float(os.environ.get("SESSION_TTL", 3600)),
+        on_evict=log_unfinished if game_log else None,
+    )
+else:
+    sessions = create_session_store(
+        "memory",
+        max_sessions=int(os.environ.get("SESSION_MAX", 10_000)),
+        ttl=float(os.environ.get("SESSION_TTL", 3600)),
+        on_evict=log_unfinished if game_log else None,
+    )
+
+# Metrics exposed on /metrics
+metrics = Registry()
+request_latency = metrics.histogram(
+    "http_request_duration_seconds", "HTTP request latency", labels=("method", "path", "status"))
+ai_moves = metrics.counter(
+    "ai_moves_total", "AI moves by how they were chosen", labels=("difficulty", "source"))
+ai_search_seconds = metrics.histogram(
+    "ai_search_seconds", "Wall time of AI move computation", labels=("difficulty",))
+ai_search_nodes = metrics.histogram(
+    "ai_search_nodes", "Nodes visited per AI search", labels=("difficulty",), buckets=COUNT_BUCKETS)
+ai_search_depth = metrics.histogram(
+    "ai_search_depth", "Depth reached per AI search", labels=("difficulty",), buckets=DEPTH_BUCKETS)
+ai_leaf_evaluations = metrics.counter(
+    "ai_leaf_evaluations_total", "Leaf positions evaluated by AI searches", labels=("difficulty",))
+ai_cutoffs = metrics.counter(
+    "ai_cutoffs_total", "Alpha-beta cutoffs in AI searches", labels=("difficulty",))
+ai_table_hits = metrics.counter(
+    "ai_transposition_hits_total", "Transposition table hits in AI searches", labels=("difficulty",))
+metrics.gauge("live_sessions", "Game sessions currently stored", function=lambda: len(sessions))
+metrics.gauge("ai_pool_pending", "AI searches waiting on the process pool", function=lambda: ai_pool.pending)
+metrics.counter("ai_pool_fallbacks_total", "AI moves computed with the shallow fallback search",
+                function=lambda: ai_pool.fallbacks)
+metrics.counter("ai_ponder_hits_total", "AI replies served from pondering", function=lambda: ponderer.hits)
+metrics.counter("ai_ponder_misses_total", "Pondered turns where the human's move had no ready reply",
+                function=lambda: ponderer.misses)
+metrics.gauge("ai_ponder_hit_ratio", "Share of pondered turns answered from pondering",
+              function=lambda: ponderer.hits / max(1, ponderer.hits + ponderer.misses))
+metrics.counter("ai_ponder_searches_total", "Speculative searches run while humans think",
+                function=lambda: ponderer.searches)
+metrics.counter("ai_ponder_seconds_total", "Search time spent pondering", function=lambda: ponderer.seconds)
+metrics.counter("games_logged_total", "Game records written to the game log",
+                function=lambda: game_log.records if game_log else 0)
+
+def record_ai_stats(difficulty: str, stats: dict):
+    ai_moves.inc(difficulty=difficulty, source=stats.get("source", "unknown"))
+    ai_search_seconds.observe(stats.get("seconds", 0.0), difficulty=difficulty)
+    if stats.get("source") in ("search", "mcts", "fallback"):
+        ai_search_nodes.observe(stats["nodes"], difficulty=difficulty)
+        ai_search_depth.observe(stats["depth"], difficulty=difficulty)
+        ai_leaf_evaluations.inc(stats["leaves"], difficulty=difficulty)
+        ai_cutoffs.inc(stats["cutoffs"], difficulty=difficulty)
+        ai_table_hits.inc(stats["table_hits"], difficulty=difficulty)
+
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    start = time.perf_counter()
+    response = await call_next(request)
+    # Label by route template so game ids do not create new series
+    route = request.scope.get("route")
+    path = getattr(route, "path", "unmatched")
+    request_latency.observe(time.perf_counter() - start, method=request.method, path=path,
+                            status=response.status_code)
+    return response
 
 class GameCreate(BaseModel):
+    variant: str = RULES.name  # Any name in rules.VARIANTS, e.g. "nine_mens_morris"
     difficulty: str = "medium"
     human_first: Optional[bool] = None
+    time_budget: Optional[float] = None  # Seconds per AI move; defaults per difficulty
+    book_variety: bool = False  # Vary the AI's opening among equally good book moves
+    engine: str = "minimax"  # "minimax" (alpha-beta) or "mcts" (Monte Carlo tree search)
 
 class MoveRequest(BaseModel):
     position: Optional[str] = None
     from_position: Optional[str] = None
     to_position: Optional[str] = None
+    remove: Optional[str] = None  # Opponent piece to remove when the move closes a mill
 
 class GameResponse(BaseModel):
     game_id: str
@@ -27,61 +162,148 @@ class GameResponse(BaseModel):
     game_over: bool
     winner: Optional[str] = None
 
+class AnalyzeRequest(BaseModel):
+    states: List[dict]  # Game states in the to_dict format
+    depth: Optional[int] = None  # Defaults to each state's difficulty depth
+
+class Analysis(BaseModel):
+    best_move: Optional[List[str]] = None
+    score: int
+    depth: int
+    pv: List[List[str]]
+
+class AnalyzeResponse(BaseModel):
+    results: List[Analysis]
+
+def wants_compact(connection) -> bool:
+    """Whether a request or WebSocket asked for the compact wire format (see wire.py)"""
+    return connection.query_params.get("format") == "compact" or \
+        connection.headers.get("x-game-format") == "compact"
+
+def game_response(request: Request, game_id: str, game: ThreeMensMorris, message: str,
+                  game_over: bool, winner: Optional[str], since: Optional[int] = None):
+    """A GameResponse, or the compact state encoded directly, skipping response validation"""
+    if wants_compact(request):
+        return Response(dumps(compact_state(game_id, game, message, game_over, winner, since)),
+                        media_type="application/json")
+    return GameResponse(game_id=game_id, state=game.to_dict(), message=message, game_over=game_over, winner=winner)
+
+@app.on_event("shutdown")
+async def shutdown_ai_pool():
+    ai_pool.shutdown()
+    if game_log:
+        game_log.close()
+
+def log_if_over(game_id: str, game: ThreeMensMorris):
+    """Append the game to the game log once its last move has been played"""
+    game_over, winner = game.is_game_over()
+    if game_over and game_log:
+        game_log.append_game(game_id, game, winner)
+
+def apply_human_move(game: ThreeMensMorris, position: Optional[str] = None,
+                     from_position: Optional[str] = None, to_position: Optional[str] = None,
+                     remove: Optional[str] = None) -> str:
+    """Validate and apply the human's move, returning a description of it"""
+    for square in (position, from_position, to_position, remove):
+        # square_bits has a key per square in the variant's rules.squares
+        if square and square not in game.square_bits:
+            raise ValueError(f"Invalid position {square}")
+    if remove is not None and not game.rules.captures:
+        raise ValueError("Pieces are only removed in variants with captures")
+    removal = () if remove is None else (remove,)
+    if game.phase == 'placement':
+        if not position:
+            raise ValueError("Position required for placement")
+        game.place_piece(position, *removal)
+        message = f"You placed piece at {position}"
+    else:
+        if not from_position or not to_position:
+            raise ValueError("Both from_position and to_position required for movement")
+        game.move_piece(from_position, to_position, *removal)
+        message = f"You moved from {from_position} to {to_position}"
+    if remove is not None:
+        message += f" and removed {remove}"
+    return message
+
+async def play_ai_move(game: ThreeMensMorris, game_id: Optional[str] = None) -> Optional[str]:
+    """Compute and apply the AI's move, returning a description or None if it has no move"""
+    start = time.perf_counter()
+    pondered = ponderer.take(game_id, game) if game_id else None
+    if pondered is not None:
+        ai_move, _ = pondered
+        stats = {"source": "ponder", "seconds": time.perf_counter() - start}
+    else:
+        stats = {}
+        ai_move = await ai_pool.get_ai_move(game, stats, game_id)
+    if stats:
+        record_ai_stats(game.difficulty, stats)
+    if not ai_move:
+        return None
+    # Moves that close a mill in a variant with captures end with the removed square
+    if ai_move[0] == 'place':
+        game.place_piece(*ai_move[1:])
+        message = f"AI placed piece at {ai_move[1]}"
+        removed = ai_move[2:]
+    else:
+        game.move_piece(*ai_move[1:])
+        message = f"AI moved from {ai_move[1]} to {ai_move[2]}"
+        removed = ai_move[3:]
+    if removed:
+        message += f" and removed {removed[0]}"
+    return message
+
 @app.post("/api/new-game", response_model=GameResponse)
-async def create_new_game(game_data: GameCreate):
-    """Create a new game session"""
-    if game_data.difficulty not in ['easy', 'medium', 'hard', 'expert']:
-        raise HTTPException(status_code=400, detail="Invalid difficulty level")
+async def create_new_game(game_data: GameCreate, request: Request):
+    """Create a new game session; ?format=compact returns the compact wire format"""
+    if game_data.variant not in VARIANTS:
+        raise HTTPException(status_code=400, detail=f"Unknown variant; choose from {', '.join(VARIANTS)}")
+    # Each variant lists its own levels; only Three Men's Morris has a tablebase for 'perfect'
+    difficulties = VARIANTS[game_data.variant].difficulty_depths
+    if game_data.difficulty not in difficulties:
+        raise HTTPException(status_code=400,
+                            detail=f"Invalid difficulty level; choose from {', '.join(difficulties)}")
+    if game_data.engine not in ["minimax", "mcts"]:
+        raise HTTPException(status_code=400, detail="Invalid engine")
+    if game_data.time_budget is not None and not 0 < game_data.time_budget <= MAX_TIME_BUDGET:
+        raise HTTPException(status_code=400, detail=f"time_budget must be between 0 and {MAX_TIME_BUDGET} seconds")
     
     game_id = str(uuid.uuid4())
-    game = ThreeMensMorris(difficulty=game_data.difficulty, human_first=game_data.human_first)
-    games[game_id] = game
+    game = create_game(game_data.variant, difficulty=game_data.difficulty, human_first=game_data.human_first,
+                       time_budget=game_data.time_budget, book_variety=game_data.book_variety,
+                       engine=game_data.engine)
     
     game_over, winner = game.is_game_over()
     
     # If AI goes first, make AI move
     if game.current_player == game.ai_player:
-        ai_move = game.get_ai_move()
-        if ai_move:
-            if ai_move[0] == 'place':
-                game.place_piece(ai_move[1])
-                message = f"AI placed piece at {ai_move[1]}"
-            else:
-                game.move_piece(ai_move[1], ai_move[2])
-                message = f"AI moved from {ai_move[1]} to {ai_move[2]}"
-            
+        ai_message = await play_ai_move(game)
+        if ai_message:
+            message = ai_message
             game_over, winner = game.is_game_over()
         else:
             message = "AI has no valid moves"
     else:
         message = "Your turn! Place your piece."
     
-    return GameResponse(
-        game_id=game_id,
-        state=game.to_dict(),
-        message=message,
-        game_over=game_over,
-        winner=winner
-    )
+    sessions.save(game_id, game)
+    ponderer.start(game_id, game)
+    return game_response(request, game_id, game, message, game_over, winner)
 
 @app.post("/api/make-move/{game_id}", response_model=GameResponse)
-async def make_move(game_id: str, move: MoveRequest):
-    """Make a move in the game"""
-    if game_id not in games:
+async def make_move(game_id: str, move: MoveRequest, request: Request, since: Optional[int] = None):
+    """Make a move in the game.
+
+    Compact responses to a request with `since`, the ply the client already
+    has, carry only the squares that changed after it.
+    """
+    game = sessions.get(game_id)
+    if game is None:
         raise HTTPException(status_code=404, detail="Game not found")
     
-    game = games[game_id]
-    
     # Check if game is over
     game_over, winner = game.is_game_over()
     if game_over:
-        return GameResponse(
-            game_id=game_id,
-            state=game.to_dict(),
-            message=f"Game is over! {winner} wins!",
-            game_over=True,
-            winner=winner
-        )
+        return game_response(request, game_id, game, f"Game is over! {winner} wins!", True, winner, since)
     
     # Check if it's human's turn
     if game.current_player != game.human_player:
@@ -89,42 +311,28 @@ async def make_move(game_id: str, move: MoveRequest):
     
     try:
         # Make human move
-        if game.phase == 'placement':
-            if not move.position:
-                raise HTTPException(status_code=400, detail="Position required for placement")
-            result = game.place_piece(move.position)
-            message = f"You placed piece at {move.position}"
-        else:
-            if not move.from_position or not move.to_position:
-                raise HTTPException(status_code=400, detail="Both from_position and to_position required for movement")
-            result = game.move_piece(move.from_position, move.to_position)
-            message = f"You moved from {move.from_position} to {move.to_position}"
+        message = apply_human_move(game, move.position, move.from_position, move.to_position, move.remove)
+        
+        # Persist the human move before the AI thinks, so other workers see it is not their turn
+        sessions.save(game_id, game)
         
         # Check if game is over after human move
         game_over, winner = game.is_game_over()
         if game_over:
-            return GameResponse(
-                game_id=game_id,
-                state=game.to_dict(),
-                message=f"{message}. Game over! {winner} wins!",
-                game_over=True,
-                winner=winner
-            )
+            log_if_over(game_id, game)
+            ponderer.cancel(game_id)
+            return game_response(request, game_id, game, f"{message}. Game over! {winner} wins!", True, winner, since)
         
         # Make AI move if it's AI's turn
         if game.current_player == game.ai_player:
-            ai_move = game.get_ai_move()
-            if ai_move:
-                if ai_move[0] == 'place':
-                    game.place_piece(ai_move[1])
-                    message += f" AI placed piece at {ai_move[1]}"
-                else:
-                    game.move_piece(ai_move[1], ai_move[2])
-                    message += f" AI moved from {ai_move[1]} to {ai_move[2]}"
+            ai_message = await play_ai_move(game, game_id)
+            if ai_message:
+                message += f" {ai_message}"
                 
                 # Check if game is over after AI move
                 game_over, winner = game.is_game_over()
                 if game_over:
+                    log_if_over(game_id, game)
                     message += f" Game over! {winner} wins!"
             else:
                 message += " AI has no valid moves"
@@ -134,40 +342,172 @@ async def make_move(game_id: str, move: MoveRequest):
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
     
-    return GameResponse(
-        game_id=game_id,
-        state=game.to_dict(),
-        message=message,
-        game_over=game_over,
-        winner=winner
-    )
+    sessions.save(game_id, game)
+    ponderer.start(game_id, game)
+    return game_response(request, game_id, game, message, game_over, winner, since)
+
+def board_delta(game: ThreeMensMorris, before: dict, by: str, message: str,
+                compact: bool = False, game_id: Optional[str] = None) -> dict:
+    """WebSocket message with only the squares that changed since `before`, one move ago"""
+    game_over, winner = game.is_game_over()
+    if game_over:
+        message += f" Game over! {winner} wins!"
+    if compact:
+        since = len(game.history) - 1
+        return {"type": "move", "by": by, **compact_state(game_id, game, message, game_over, winner, since)}
+    positions = game.positions
+    return {
+        "type": "move",
+        "by": by,
+        "changes": {sq: owner for sq, owner in positions.items() if before[sq] != owner},
+        "phase": game.phase,
+        "current_player": game.current_player,
+        "game_over": game_over,
+        "winner": winner,
+        "message": message,
+    }
+
+async def send_state(websocket: WebSocket, message: dict, compact: bool):
+    """Send a state or move message, with the fast encoder in the compact format"""
+    if compact:
+        await websocket.send_text(dumps(message).decode())
+    else:
+        await websocket.send_json(message)
+
+@app.websocket("/ws/game/{game_id}")
+async def game_channel(websocket: WebSocket, game_id: str):
+    """One connection per game: moves in as {"move": "e"} or {"move": "ae"}, board deltas out.
+
+    Variants with multi-letter square names send {"move": ["a1", "d1"]}, and
+    a move closing a mill in a variant with captures adds {"remove": "g7"}.
+
+    The full state is sent once on connect; after that each human move and
+    AI reply is pushed as a "move" message as soon as it is applied, with a
+    "thinking" message while the AI searches. Bad moves get an "error"
+    message and the connection stays open. Connecting with ?format=compact
+    sends the state and moves in the compact wire format instead.
+    """
+    compact = wants_compact(websocket)
+    await websocket.accept()
+    game = sessions.get(game_id)
+    if game is None:
+        await websocket.send_json({"type": "error", "detail": "Game not found"})
+        await websocket.close(code=4404)
+        return
+    
+    game_over, winner = game.is_game_over()
+    if compact:
+        state = {"type": "state", **compact_state(game_id, game, "Current game state", game_over, winner)}
+    else:
+        state = {"type": "state", "state": game.to_dict(), "game_over": game_over, "winner": winner}
+    await send_state(websocket, state, compact)
+    
+    try:
+        while True:
+            try:
+                data = json.loads(await websocket.receive_text())
+            except ValueError:
+                await websocket.send_json({"type": "error", "detail": "Messages must be JSON"})
+                continue
+            # Reload on every message; with SESSION_STORE=sqlite another worker may have moved
+            game = sessions.get(game_id)
+            if game is None:
+                await websocket.send_json({"type": "error", "detail": "Game not found"})
+                await websocket.close(code=4404)
+                return
+            
+            squares = data.get("move") if isinstance(data, dict) else None
+            if isinstance(squares, str):
+                squares = list(squares)
+            if not isinstance(squares, list) or len(squares) not in (1, 2) or \
+               not all(isinstance(sq, str) for sq in squares):
+                await websocket.send_json({"type": "error", "detail": "Expected {\"move\": \"e\"}, {\"move\": \"ae\"} or {\"move\": [\"a1\", \"d1\"]}"})
+                continue
+            remove = data.get("remove")
+            if game.is_game_over()[0]:
+                await websocket.send_json({"type": "error", "detail": "Game is over"})
+                continue
+            if game.current_player != game.human_player:
+                await websocket.send_json({"type": "error", "detail": "It's not your turn"})
+                continue
+            
+            before = game.positions
+            try:
+                if len(squares) == 1:
+                    message = apply_human_move(game, position=squares[0], remove=remove)
+                else:
+                    message = apply_human_move(game, from_position=squares[0], to_position=squares[1], remove=remove)
+            except Exception as e:
+                await websocket.send_json({"type": "error", "detail": str(e)})
+                continue
+            sessions.save(game_id, game)
+            log_if_over(game_id, game)
+            await send_state(websocket, board_delta(game, before, "human", message, compact, game_id), compact)
+            
+            if game.is_game_over()[0] or game.current_player != game.ai_player:
+                ponderer.cancel(game_id)
+                continue
+            await websocket.send_json({"type": "thinking"})
+            before = game.positions
+            ai_message = await play_ai_move(game, game_id)
+            sessions.save(game_id, game)
+            log_if_over(game_id, game)
+            ponderer.start(game_id, game)
+            if ai_message is None:
+                # Same outcome the HTTP endpoint reports when the AI is stuck
+                delta = board_delta(game, before, "ai", "AI has no valid moves", compact, game_id)
+                if compact:
+                    delta.update(over=True, winner=CHARS[game.human_player])
+                else:
+                    delta.update(game_over=True, winner=game.human_player)
+            else:
+                delta = board_delta(game, before, "ai", ai_message, compact, game_id)
+            await send_state(websocket, delta, compact)
+    except WebSocketDisconnect:
+        pass
+
+@app.post("/api/analyze", response_model=AnalyzeResponse)
+async def analyze(request: AnalyzeRequest):
+    """Best move, score and principal variation for the player to move in each state"""
+    if len(request.states) > MAX_ANALYZE_BATCH:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_ANALYZE_BATCH} states per request")
+    if request.depth is not None and not 1 <= request.depth <= MAX_ANALYZE_DEPTH:
+        raise HTTPException(status_code=400, detail=f"depth must be between 1 and {MAX_ANALYZE_DEPTH}")
+    
+    try:
+        # States without an explicit depth use their difficulty's, which may exceed the cap
+        results = await ai_pool.analyze(request.states, depth=request.depth, max_depth=MAX_ANALYZE_DEPTH)
+    except (KeyError, TypeError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid game state: {e}")
+    
+    return AnalyzeResponse(results=results)
 
 @app.get("/api/game/{game_id}", response_model=GameResponse)
-async def get_game_state(game_id: str):
+async def get_game_state(game_id: str, request: Request, since: Optional[int] = None):
     """Get current game state"""
-    if game_id not in games:
+    game = sessions.get(game_id)
+    if game is None:
         raise HTTPException(status_code=404, detail="Game not found")
-    
-    game = games[game_id]
     game_over, winner = game.is_game_over()
     
-    return GameResponse(
-        game_id=game_id,
-        state=game.to_dict(),
-        message="Current game state",
-        game_over=game_over,
-        winner=winner
-    )
+    return game_response(request, game_id, game, "Current game state", game_over, winner, since)
 
 @app.delete("/api/game/{game_id}")
 async def delete_game(game_id: str):
-    """Delete a game session"""
-    if game_id not in games:
+    """Delete a game session, logging it first if it was left unfinished"""
+    ponderer.cancel(game_id)
+    game = sessions.get(game_id) if game_log else None
+    if not sessions.delete(game_id):
         raise HTTPException(status_code=404, detail="Game not found")
-    
-    del games[game_id]
+    if game is not None:
+        log_unfinished(game_id, game)
     return {"message": "Game deleted successfully"}
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Prometheus-style metrics for AI searches, request latency and sessions"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 # Serve static files
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
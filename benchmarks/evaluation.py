@@ -0,0 +1,84 @@
+"""Check the table-driven leaf evaluation against the from-scratch evaluator and time both.
+
+Every reachable position is visited by pushing and popping moves, so the
+incrementally maintained base-3 index is exercised along with the score
+tables. Run from the repository root:
+
+    python -m benchmarks.evaluation [--repeat 20]
+"""
+import argparse
+import sys
+import time
+from collections import deque
+
+from bitboard import BLUE, PLAYERS, RED, TERNARY, BitBoard
+from search import SCORES, heuristic
+
+
+def reachable_positions():
+    """Snapshots of every position reachable from either starting side, checking `index` on the way"""
+    seen = set()
+    queue = deque()
+    for turn in (BLUE, RED):
+        start = BitBoard(turn).snapshot()
+        seen.add(start)
+        queue.append(start)
+
+    board = BitBoard()
+    while queue:
+        board.restore(queue.popleft())
+        if board.search_outcome() is not None:
+            continue
+        for move in board.moves(board.turn):
+            board.push(move)
+            expected = TERNARY[board.pieces[BLUE]] + 2 * TERNARY[board.pieces[RED]]
+            if board.index != expected:
+                raise AssertionError(f"index {board.index} != {expected} after {move}")
+            child = board.snapshot()
+            board.pop(move)
+            if child not in seen:
+                seen.add(child)
+                queue.append(child)
+    return list(seen)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=20, help="timing passes over all positions")
+    args = parser.parse_args()
+
+    boards = []
+    for snapshot in reachable_positions():
+        board = BitBoard()
+        board.restore(snapshot)
+        boards.append(board)
+
+    mismatches = 0
+    for board in boards:
+        for ai in range(len(PLAYERS)):
+            if SCORES[ai][board.index] != heuristic(board, ai):
+                mismatches += 1
+    print(f"{len(boards)} positions, {mismatches} mismatches")
+
+    evaluations = len(boards) * len(PLAYERS) * args.repeat
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        for board in boards:
+            heuristic(board, BLUE)
+            heuristic(board, RED)
+    scratch = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        for board in boards:
+            SCORES[BLUE][board.index]
+            SCORES[RED][board.index]
+    table = time.perf_counter() - start
+
+    print(f"from scratch: {1e9 * scratch / evaluations:.0f} ns/eval")
+    print(f"table lookup: {1e9 * table / evaluations:.0f} ns/eval ({scratch / table:.1f}x)")
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
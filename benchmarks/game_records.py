@@ -0,0 +1,87 @@
+"""Write and stream back a large game log, checking that records replay exactly.
+
+Random games of every variant are logged many times over (under fresh game
+ids) through GameLog, then the log is read back with read_records and
+summarized. A sample of the records is also replayed and must reach the
+same final position as the game that was logged. Run from the repository root:
+
+    python -m benchmarks.game_records [--records 1000000] [--path /tmp/games.log]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import uuid
+from array import array
+
+from game_log import GameLog, read_records, record_from_game, replay, summarize
+from morris import create_game
+from rules import VARIANTS
+
+
+def random_game(variant, rng, max_plies=60):
+    """A game of `variant` played by random moves, with random think times"""
+    game = create_game(variant, difficulty=rng.choice(['easy', 'medium', 'expert']), human_first=rng.random() < 0.5)
+    for _ in range(rng.randrange(max_plies)):
+        if game.is_game_over()[0]:
+            break
+        game.make_move(rng.choice(game.get_valid_moves(game.current_player)))
+    game.move_times = array('I', (rng.randrange(50, 20_000) for _ in game.history))
+    return game
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--records', type=int, default=200_000)
+    parser.add_argument('--games', type=int, default=500, help="distinct random games to log repeatedly")
+    parser.add_argument('--sample', type=int, default=2000, help="records replayed to check positions")
+    parser.add_argument('--path', default='games-benchmark.log')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    variants = list(VARIANTS)
+    games = [random_game(variants[i % len(variants)], rng) for i in range(args.games)]
+    winners = [game.is_game_over()[1] for game in games]
+
+    if os.path.exists(args.path):
+        os.remove(args.path)
+    log = GameLog(args.path)
+    start = time.perf_counter()
+    for i in range(args.records):
+        log.append(record_from_game(str(uuid.UUID(int=i)), games[i % args.games], winners[i % args.games]))
+    queued = time.perf_counter() - start
+    log.close()
+    written = time.perf_counter() - start
+    size = os.path.getsize(args.path)
+    print(f"{args.records} records, {size / args.records:.0f} bytes each: appended in "
+          f"{queued / args.records * 1e6:.1f} us per record, written in {log.batches} batches "
+          f"({args.records / written:.0f} records/s)")
+
+    start = time.perf_counter()
+    summary = summarize(read_records(args.path))
+    seconds = time.perf_counter() - start
+    print(f"Streamed and summarized in {seconds:.2f}s ({args.records / seconds:.0f} records/s)")
+    for (variant, difficulty, engine), totals in sorted(summary.items()):
+        print(f"  {variant} {difficulty} {engine}: {totals['games']} games, {totals['moves'] / totals['games']:.1f} "
+              f"moves per game, {totals['unfinished']} unfinished")
+
+    mismatches = sum(totals['games'] for totals in summary.values()) != args.records
+    start = time.perf_counter()
+    for i, record in enumerate(read_records(args.path)):
+        if i >= args.sample:
+            break
+        game = games[i % args.games]
+        mismatches += record != record_from_game(record.game_id, game, winners[i % args.games])
+        for _, replayed in replay(record):
+            pass
+        mismatches += replayed.positions != game.positions or replayed.is_game_over() != game.is_game_over()
+    seconds = time.perf_counter() - start
+    print(f"Replayed {min(args.sample, args.records)} records in {seconds:.2f}s, {mismatches} mismatches")
+    os.remove(args.path)
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+"""Load generator that plays many concurrent games against the FastAPI app.
+
+By default the app is driven in-process through httpx's ASGI transport; pass
+--url to load a running server instead (and --server-pid to track its
+memory). Run from the repository root:
+
+    python -m benchmarks.loadtest --games 2000 --concurrency 500 --human random
+    python -m benchmarks.loadtest --url http://localhost:8000 --server-pid 1234
+
+Each simulated player creates a game of --variant via /api/new-game with a
+difficulty from --difficulties, plays it to the end with human moves picked
+by --human (random, first legal move, or the 'easy' engine) and deletes it. The report
+gives throughput, p50/p95/p99 latency and error rate per endpoint and the
+server's resident memory sampled over the run. Requires httpx.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+
+import httpx
+
+from benchmarks.selfplay import percentile
+from morris import game_from_dict
+from rules import RULES, VARIANTS
+
+
+
+def resident_memory(pid='self'):
+    """Resident set size in bytes from /proc, or None where that is unavailable"""
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        return None
+    return None
+
+
+class Recorder:
+    """Latency and outcome of every request, by endpoint"""
+
+    def __init__(self):
+        self.latencies = {}
+        self.errors = {}
+
+    async def request(self, client, method, endpoint, url, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+            failed = response.status_code >= 400
+        except httpx.HTTPError:
+            response, failed = None, True
+        self.latencies.setdefault(endpoint, []).append(time.perf_counter() - start)
+        self.errors[endpoint] = self.errors.get(endpoint, 0) + failed
+        return None if failed else response.json()
+
+    def summary(self, seconds):
+        endpoints = {}
+        for endpoint, latencies in sorted(self.latencies.items()):
+            endpoints[endpoint] = {
+                'requests': len(latencies),
+                'errors': self.errors[endpoint],
+                'error_rate': self.errors[endpoint] / len(latencies),
+                'requests_per_second': len(latencies) / seconds,
+                'latency_ms': {
+                    'p50': 1000 * percentile(latencies, 0.50),
+                    'p95': 1000 * percentile(latencies, 0.95),
+                    'p99': 1000 * percentile(latencies, 0.99),
+                    'max': 1000 * max(latencies),
+                },
+            }
+        return endpoints
+
+
+def choose_move(state, strategy, rng):
+    """The simulated human's move for a to_dict state, as a /api/make-move payload"""
+    game = game_from_dict(state)
+    moves = game.get_valid_moves(game.human_player)
+    if not moves:
+        return None
+    if strategy == 'engine':
+        # Play the human side with the 'easy' engine
+        game.ai_player, game.human_player = game.human_player, game.ai_player
+        game.difficulty, game.search_depth = 'easy', game.difficulty_depths['easy']
+        move = game.get_ai_move(time_budget=0)
+    elif strategy == 'first':
+        move = moves[0]
+    else:
+        move = rng.choice(moves)
+    if move[0] == 'place':
+        payload = {'position': move[1]}
+        removed = move[2:]
+    else:
+        payload = {'from_position': move[1], 'to_position': move[2]}
+        removed = move[3:]
+    if removed:
+        payload['remove'] = removed[0]
+    return payload
+
+
+async def play_game(client, recorder, variant, difficulty, strategy, rng, max_moves, keep):
+    """Create, play out and delete one game; returns the number of human moves made"""
+    data = await recorder.request(client, 'POST', 'POST /api/new-game', '/api/new-game',
+                                  json={'variant': variant, 'difficulty': difficulty})
+    if data is None:
+        return 0
+    game_id = data['game_id']
+    moves = 0
+    while not data['game_over'] and moves < max_moves:
+        payload = choose_move(data['state'], strategy, rng)
+        if payload is None:
+            break
+        data = await recorder.request(client, 'POST', 'POST /api/make-move/{game_id}',
+                                      f'/api/make-move/{game_id}', json=payload)
+        if data is None:
+            break
+        moves += 1
+    if not keep:
+        await recorder.request(client, 'DELETE', 'DELETE /api/game/{game_id}', f'/api/game/{game_id}')
+    return moves
+
+
+async def sample_memory(pid, interval, start, samples):
+    while True:
+        samples.append((time.perf_counter() - start, resident_memory(pid)))
+        await asyncio.sleep(interval)
+
+
+async def run(args):
+    rng = random.Random(args.seed)
+    recorder = Recorder()
+    if args.url:
+        transport, base_url, pid = None, args.url, args.server_pid
+    else:
+        import app
+
+        transport, base_url, pid = httpx.ASGITransport(app=app.app), 'http://loadtest', os.getpid()
+
+    games = [rng.choice(args.difficulties) for _ in range(args.games)]
+    slots = asyncio.Semaphore(args.concurrency)
+    samples = []
+    start = time.perf_counter()
+    sampler = asyncio.create_task(sample_memory(pid or 'self', args.sample_interval, start, samples)) \
+        if pid or not args.url else None
+
+    async with httpx.AsyncClient(transport=transport, base_url=base_url, timeout=args.timeout,
+                                 limits=httpx.Limits(max_connections=args.concurrency)) as client:
+        async def player(difficulty, seed):
+            async with slots:
+                return await play_game(client, recorder, args.variant, difficulty, args.human,
+                                       random.Random(seed), args.max_moves, args.keep)
+
+        moves = await asyncio.gather(*(player(d, rng.random()) for d in games))
+
+    seconds = time.perf_counter() - start
+    if sampler is not None:
+        sampler.cancel()
+        samples.append((seconds, resident_memory(pid or 'self')))
+    if not args.url:
+        app.ai_pool.shutdown()
+
+    known = [rss for _, rss in samples if rss is not None]
+    requests = sum(len(latencies) for latencies in recorder.latencies.values())
+    return {
+        'games': args.games,
+        'variant': args.variant,
+        'concurrency': args.concurrency,
+        'human': args.human,
+        'seconds': seconds,
+        'games_per_second': args.games / seconds,
+        'requests_per_second': requests / seconds,
+        'human_moves': sum(moves),
+        'endpoints': recorder.summary(seconds),
+        'memory': {
+            'start_bytes': known[0] if known else None,
+            'end_bytes': known[-1] if known else None,
+            'peak_bytes': max(known) if known else None,
+            'samples': samples,
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', help="server to load (default: the app in this process)")
+    parser.add_argument('--server-pid', type=int, help="server process whose memory to sample with --url")
+    parser.add_argument('--games', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=200, help="games in flight at once")
+    parser.add_argument('--difficulties', type=lambda s: s.split(','),
+                        help="comma-separated difficulties to draw games from (default: all of the variant's)")
+    parser.add_argument('--variant', default=RULES.name, choices=sorted(VARIANTS))
+    parser.add_argument('--human', choices=('random', 'first', 'engine'), default='random')
+    parser.add_argument('--max-moves', type=int, default=100, help="human moves before a game is abandoned")
+    parser.add_argument('--keep', action='store_true', help="do not delete finished games")
+    parser.add_argument('--timeout', type=float, default=30.0, help="seconds per request")
+    parser.add_argument('--sample-interval', type=float, default=1.0, help="seconds between memory samples")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help="write the full report to this file")
+    args = parser.parse_args()
+    if args.difficulties is None:
+        args.difficulties = list(VARIANTS[args.variant].difficulty_depths)
+
+    report = asyncio.run(run(args))
+    print(f"{report['games']} games, {report['human_moves']} human moves in {report['seconds']:.1f}s "
+          f"({report['games_per_second']:.1f} games/s, {report['requests_per_second']:.1f} requests/s)")
+    for endpoint, stats in report['endpoints'].items():
+        latency = stats['latency_ms']
+        print(f"  {endpoint}: {stats['requests']} requests, {100 * stats['error_rate']:.2f}% errors, "
+              f"p50 {latency['p50']:.1f}  p95 {latency['p95']:.1f}  p99 {latency['p99']:.1f} ms")
+    memory = report['memory']
+    if memory['start_bytes'] is not None:
+        print(f"  server RSS {memory['start_bytes'] / 2**20:.1f} -> {memory['end_bytes'] / 2**20:.1f} MiB "
+              f"(peak {memory['peak_bytes'] / 2**20:.1f} MiB)")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+"""Engine-vs-engine self-play for measuring AI strength and search speed.
+
+Each engine is described by comma-separated settings, for example:
+
+    python -m benchmarks.selfplay expert "difficulty=hard,depth=4,time_budget=0.5" \\
+        --games 200 --workers 4 --json report.json --csv moves.csv
+    python -m benchmarks.selfplay "engine=mcts,iterations=2000,time_budget=0" expert
+
+Settings are difficulty, depth, time_budget, iterations (MCTS leaves per
+move) and engine ('minimax' or 'mcts'). A bare word is taken as the difficulty. Engines alternate
+colors and who moves first, and the first `--random-plies` plies of each
+game are random so that deterministic engines play different games.
+"""
+import argparse
+import csv
+import json
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple, Optional
+
+from mcts import TreeCache
+from symmetry import PositionCache
+from three_mens_morris import ThreeMensMorris
+from transposition import TranspositionTable
+
+
+class EngineConfig(NamedTuple):
+    name: str
+    difficulty: str = 'medium'
+    depth: Optional[int] = None
+    time_budget: Optional[float] = None
+    engine: str = 'minimax'
+    iterations: Optional[int] = None
+
+
+def parse_engine(spec):
+    """EngineConfig from 'expert' or 'difficulty=hard,depth=4,time_budget=0.5'"""
+    settings = {}
+    for part in spec.split(','):
+        key, sep, value = part.partition('=')
+        if not sep:
+            key, value = 'difficulty', key
+        settings[key.strip()] = value.strip()
+    return EngineConfig(
+        name=spec,
+        difficulty=settings.get('difficulty', 'medium'),
+        depth=int(settings['depth']) if 'depth' in settings else None,
+        time_budget=float(settings['time_budget']) if 'time_budget' in settings else None,
+        engine=settings.get('engine', 'minimax'),
+        iterations=int(settings['iterations']) if 'iterations' in settings else None,
+    )
+
+
+class Player:
+    """One engine's view of the game, with its own search tables"""
+
+    def __init__(self, config):
+        self.config = config
+        self.transposition_table = TranspositionTable()
+        self.position_cache = PositionCache()
+        self.tree_cache = TreeCache()
+
+    def choose_move(self, state):
+        game = ThreeMensMorris(
+            difficulty=self.config.difficulty,
+            transposition_table=self.transposition_table,
+            position_cache=self.position_cache,
+            tree_cache=self.tree_cache,
+            time_budget=self.config.time_budget,
+        )
+        # The engine always plays as the "AI" of its own view of the game
+        side = state['current_player']
+        game.from_dict(dict(
+            state, ai_player=side, human_player='red' if side == 'blue' else 'blue',
+            difficulty=self.config.difficulty, time_budget=game.time_budget
+        ))
+        stats = {}
+        move = ENGINES[self.config.engine](game, self.config, stats)
+        return move, stats
+
+
+def _minimax_move(game, config, stats):
+    return game.get_ai_move(depth=config.depth, stats=stats)
+
+
+def _mcts_move(game, config, stats):
+    game.engine = 'mcts'
+    return game.get_ai_move(stats=stats, iterations=config.iterations)
+
+
+ENGINES = {
+    'minimax': _minimax_move,
+    'mcts': _mcts_move,
+}
+
+
+def play_game(args):
+    """Play one game; engine A is blue when `index` is even and moves first every other pair"""
+    config_a, config_b, index, seed, random_plies, max_plies = args
+    rng = random.Random(seed * 1_000_003 + index)
+    random.seed(rng.random())
+    a_color = 'blue' if index % 2 == 0 else 'red'
+    players = {a_color: ('A', Player(config_a)), ('red' if a_color == 'blue' else 'blue'): ('B', Player(config_b))}
+
+    game = ThreeMensMorris(human_first=(index // 2) % 2 == 0)
+    moves = []
+    for ply in range(max_plies):
+        if game.is_game_over()[0]:
+            break
+        side = game.current_player
+        label, player = players[side]
+        if ply < random_plies:
+            move, stats, elapsed = rng.choice(game.get_valid_moves(side)), {'source': 'random', 'nodes': 0}, 0.0
+        else:
+            start = time.perf_counter()
+            move, stats = player.choose_move(game.to_dict())
+            elapsed = time.perf_counter() - start
+        moves.append({
+            'game': index, 'ply': ply, 'engine': label, 'move': ' '.join(move),
+            'source': stats.get('source'), 'nodes': stats.get('nodes', 0),
+            'depth': stats.get('depth', 0), 'seconds': elapsed,
+        })
+        game.make_move(move)
+
+    # Games still running after max_plies count as draws
+    winner = game.is_game_over()[1]
+    result = 'draw' if winner is None else ('A' if players[winner][0] == 'A' else 'B')
+    return {'game': index, 'a_color': a_color, 'result': result, 'plies': len(moves), 'moves': moves}
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def summarize(config, label, games):
+    moves = [m for g in games for m in g['moves'] if m['engine'] == label and m['source'] != 'random']
+    latencies = [m['seconds'] for m in moves]
+    nodes = sum(m['nodes'] for m in moves)
+    seconds = sum(latencies)
+    return {
+        'engine': config._asdict(),
+        'wins': sum(g['result'] == label for g in games),
+        'draws': sum(g['result'] == 'draw' for g in games),
+        'losses': sum(g['result'] not in (label, 'draw') for g in games),
+        'moves': len(moves),
+        'nodes': nodes,
+        'nodes_per_second': nodes / seconds if seconds else 0.0,
+        'latency_ms': {
+            'mean': 1000 * seconds / len(moves) if moves else 0.0,
+            'p50': 1000 * percentile(latencies, 0.50),
+            'p90': 1000 * percentile(latencies, 0.90),
+            'p99': 1000 * percentile(latencies, 0.99),
+            'max': 1000 * max(latencies, default=0.0),
+        },
+    }
+
+
+def run_match(config_a, config_b, games=100, workers=None, seed=0, random_plies=2, max_plies=200):
+    """Play `games` games between two engines and return the report dict"""
+    jobs = [(config_a, config_b, i, seed, random_plies, max_plies) for i in range(games)]
+    start = time.perf_counter()
+    if workers == 0:
+        played = [play_game(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            played = list(pool.map(play_game, jobs))
+    wall = time.perf_counter() - start
+    return {
+        'games': games,
+        'seed': seed,
+        'wall_seconds': wall,
+        'A': summarize(config_a, 'A', played),
+        'B': summarize(config_b, 'B', played),
+        'records': played,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('engine_a')
+    parser.add_argument('engine_b')
+    parser.add_argument('--games', type=int, default=100)
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (0 plays in-process)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--random-plies', type=int, default=2)
+    parser.add_argument('--max-plies', type=int, default=200, help="plies before a game is scored a draw")
+    parser.add_argument('--json', help="write the summary report to this file")
+    parser.add_argument('--csv', help="write one row per move to this file")
+    args = parser.parse_args()
+
+    report = run_match(parse_engine(args.engine_a), parse_engine(args.engine_b), games=args.games,
+                       workers=args.workers, seed=args.seed, random_plies=args.random_plies,
+                       max_plies=args.max_plies)
+    records = report.pop('records')
+
+    for label in ('A', 'B'):
+        side = report[label]
+        latency = side['latency_ms']
+        print(f"{label}: {side['engine']['name']}")
+        print(f"  W/D/L {side['wins']}/{side['draws']}/{side['losses']}, {side['moves']} moves, "
+              f"{side['nodes']} nodes, {side['nodes_per_second']:.0f} nodes/s")
+        print(f"  latency ms p50 {latency['p50']:.2f}  p90 {latency['p90']:.2f}  "
+              f"p99 {latency['p99']:.2f}  max {latency['max']:.2f}")
+    print(f"{report['games']} games in {report['wall_seconds']:.1f}s")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.csv:
+        with open(args.csv, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=list(records[0]['moves'][0]) if records else [])
+            writer.writeheader()
+            for record in records:
+                writer.writerows(record['moves'])
+
+
+if __name__ == "__main__":
+    main()
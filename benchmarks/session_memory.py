@@ -0,0 +1,60 @@
+"""Bytes per live session for many concurrent games.
+
+Run from the repository root:
+
+    python -m benchmarks.session_memory [--sessions 100000]
+"""
+import argparse
+import json
+import random
+import tracemalloc
+
+from three_mens_morris import ThreeMensMorris
+
+
+def _play_random_moves(game, plies, rng):
+    for _ in range(plies):
+        if game.is_game_over()[0]:
+            break
+        move = rng.choice(game.get_valid_moves(game.current_player))
+        game.make_move(move)
+
+
+def measure(factory, count):
+    """Traced bytes allocated per object built by `factory`"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects = [factory(i) for i in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del objects
+    return (after - before) / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sessions', type=int, default=100_000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    difficulties = list(ThreeMensMorris.difficulty_depths)
+
+    def new_game(i):
+        return ThreeMensMorris(difficulty=difficulties[i % len(difficulties)], human_first=bool(i % 2))
+
+    def mid_game(i):
+        game = new_game(i)
+        _play_random_moves(game, 8, rng)
+        return game
+
+    def serialized(i):
+        return json.dumps(mid_game(i).to_dict(include_history=True), separators=(',', ':'))
+
+    print(f"{args.sessions} sessions")
+    print(f"  new game:          {measure(new_game, args.sessions):8.1f} bytes/session")
+    print(f"  mid game:          {measure(mid_game, args.sessions):8.1f} bytes/session")
+    print(f"  SQLite store JSON: {measure(serialized, args.sessions):8.1f} bytes/session")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Check the variant engine against BitBoard and time it on every variant.
+
+With the Three Men's Morris rules, MorrisBoard must generate the same moves,
+outcomes and search results as BitBoard in every reachable position. Then
+each variant is timed with a perft (move generation and make/unmake only)
+and with searches from positions reached by random play. Run from the
+repository root:
+
+    python -m benchmarks.variants [--perft-depth 3] [--search-depth 4] [--positions 20]
+"""
+import argparse
+import random
+import sys
+import time
+
+from benchmarks.evaluation import reachable_positions
+from bitboard import BLUE, MOVE_TUPLES, RED, BitBoard
+from morris import MorrisBoard, get_topology, heuristic as variant_heuristic
+from rules import RULES, VARIANTS
+from search import Search, heuristic
+from transposition import TranspositionTable
+
+
+def check_three_mens_morris(search_depth, sample, rng):
+    """(positions, mismatches) between MorrisBoard and BitBoard under the default rules"""
+    topology = get_topology(RULES)
+    snapshots = reachable_positions()
+    mismatches = 0
+    for snapshot in snapshots:
+        bitboard = BitBoard()
+        bitboard.restore(snapshot)
+        board = MorrisBoard(topology)
+        board.restore(snapshot)
+        expected = [MOVE_TUPLES[move] for move in bitboard.moves(bitboard.turn)]
+        mismatches += expected != [topology.move_tuple(move) for move in board.moves(board.turn)]
+        mismatches += bitboard.search_outcome() != board.search_outcome()
+
+    # search.heuristic only reads the piece sets, so both boards can share it
+    for snapshot in rng.sample(snapshots, min(sample, len(snapshots))):
+        bitboard = BitBoard()
+        bitboard.restore(snapshot)
+        if bitboard.search_outcome() is not None:
+            continue
+        board = MorrisBoard(topology)
+        board.restore(snapshot)
+        for ai in (BLUE, RED):
+            expected = Search(bitboard, ai, TranspositionTable()).search_root(
+                bitboard.moves(bitboard.turn), search_depth)
+            actual = Search(board, ai, TranspositionTable(), evaluate=heuristic).search_root(
+                board.moves(board.turn), search_depth)
+            mismatches += (MOVE_TUPLES[expected[0]], expected[1]) != (topology.move_tuple(actual[0]), actual[1])
+    return len(snapshots), mismatches
+
+
+def perft(board, depth):
+    """Number of move sequences of `depth` plies, stopping at finished games"""
+    if depth == 0 or board.search_outcome() is not None:
+        return 1
+    count = 0
+    for move in board.moves(board.turn):
+        board.push(move)
+        count += perft(board, depth - 1)
+        board.pop(move)
+    return count
+
+
+def random_position(topology, plies, rng):
+    """Board after up to `plies` random moves that do not end the game"""
+    board = MorrisBoard(topology)
+    for _ in range(plies):
+        moves = board.moves(board.turn)
+        rng.shuffle(moves)
+        for move in moves:
+            board.push(move)
+            if board.search_outcome() is None:
+                break
+            board.pop(move)
+        else:
+            break
+    return board
+
+
+def time_variant(rules, perft_depth, search_depth, positions, rng):
+    topology = get_topology(rules)
+    board = MorrisBoard(topology)
+    start = time.perf_counter()
+    count = perft(board, perft_depth)
+    perft_seconds = time.perf_counter() - start
+
+    nodes = 0
+    start = time.perf_counter()
+    for _ in range(positions):
+        board = random_position(topology, rng.randrange(4 * rules.max_pieces), rng)
+        search = Search(board, board.turn, TranspositionTable(), evaluate=variant_heuristic)
+        search.iterate(board.moves(board.turn), search_depth)
+        nodes += search.nodes
+    search_seconds = time.perf_counter() - start
+    print(f"{rules.name}: {len(topology.squares)} points, {rules.max_pieces} pieces; "
+          f"perft({perft_depth}) = {count} in {perft_seconds:.2f}s ({count / perft_seconds:.0f}/s); "
+          f"depth {search_depth} search {nodes / search_seconds:.0f} nodes/s "
+          f"({search_seconds / positions * 1000:.0f} ms/position)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--perft-depth', type=int, default=3)
+    parser.add_argument('--search-depth', type=int, default=4)
+    parser.add_argument('--positions', type=int, default=20, help="random positions searched per variant")
+    parser.add_argument('--check-sample', type=int, default=500, help="positions whose search results are compared")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    count, mismatches = check_three_mens_morris(3, args.check_sample, rng)
+    print(f"{count} reachable Three Men's Morris positions, {mismatches} mismatches")
+    for rules in VARIANTS.values():
+        time_variant(rules, args.perft_depth, args.search_depth, args.positions, rng)
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
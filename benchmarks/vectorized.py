@@ -0,0 +1,114 @@
+"""Check the NumPy evaluator against the scalar one and compare their throughput.
+
+Every reachable position is checked exactly (evaluate_position, the
+from-scratch heuristic, search outcomes and batched child scores), then
+random boards are scored in bulk. Run from the repository root:
+
+    python -m benchmarks.vectorized [--positions 2000000] [--scalar-sample 200000]
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+
+import vectorized
+from benchmarks.evaluation import reachable_positions
+from bitboard import BLUE, PLAYERS, RED, SQUARES, BitBoard
+from search import INF, Search, heuristic
+from three_mens_morris import ThreeMensMorris
+from transposition import TranspositionTable
+
+
+def check_reachable():
+    """Number of disagreements between the NumPy and scalar evaluators over all reachable positions"""
+    boards = []
+    for snapshot in reachable_positions():
+        board = BitBoard()
+        board.restore(snapshot)
+        boards.append(board)
+    cells = vectorized.encode(boards)
+    turns = np.array([board.turn for board in boards])
+    game = ThreeMensMorris(human_first=True)
+
+    mismatches = 0
+    for ai in (BLUE, RED):
+        game.ai_player, game.human_player = PLAYERS[ai], PLAYERS[ai ^ 1]
+        evaluated = vectorized.evaluate(cells, turns, ai)
+        scored = vectorized.heuristic(cells, ai)
+        for board, value, score in zip(boards, evaluated, scored):
+            game.board = board
+            mismatches += value != game.evaluate_position()
+            mismatches += score != heuristic(board, ai)
+
+        search = Search(BitBoard(), ai, TranspositionTable())
+        for board in boards:
+            if board.search_outcome() is not None:
+                continue
+            moves, scores = vectorized.score_children(board, ai)
+            search.board = board
+            for move, score in zip(moves, scores):
+                board.push(move)
+                mismatches += score != search.minimax(0, False, -INF, INF)
+                board.pop(move)
+
+    outcomes = vectorized.outcomes(cells, turns)
+    mismatches += sum(
+        outcome != (-1 if board.search_outcome() is None else board.search_outcome())
+        for board, outcome in zip(boards, outcomes)
+    )
+    return len(boards), mismatches
+
+
+def random_cells(count, rng):
+    """(count, 9) boards with 0-3 pieces per side on random squares"""
+    ranks = rng.random((count, len(SQUARES))).argsort(axis=1)
+    blue = rng.integers(0, 4, count)[:, None]
+    red = rng.integers(0, 4, count)[:, None]
+    return np.where(ranks < blue, 1, np.where(ranks < blue + red, 2, 0)).astype(np.int8)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--positions', type=int, default=2_000_000)
+    parser.add_argument('--scalar-sample', type=int, default=200_000, help="boards scored one at a time")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    count, mismatches = check_reachable()
+    print(f"{count} reachable positions, {mismatches} mismatches")
+
+    rng = np.random.default_rng(args.seed)
+    cells = random_cells(args.positions, rng)
+    turns = rng.integers(0, 2, args.positions)
+
+    start = time.perf_counter()
+    values = vectorized.evaluate(cells, turns, RED)
+    vector_seconds = time.perf_counter() - start
+
+    # Scalar evaluate_position on a sample of the same boards
+    sample = min(args.scalar_sample, args.positions)
+    blue_bits = (cells[:sample] == 1) @ (1 << np.arange(len(SQUARES)))
+    red_bits = (cells[:sample] == 2) @ (1 << np.arange(len(SQUARES)))
+    snapshots = [
+        (int(b), int(r), int(t), bin(b).count('1'), bin(r).count('1'))
+        for b, r, t in zip(blue_bits, red_bits, turns[:sample])
+    ]
+    game = ThreeMensMorris(human_first=True)
+    start = time.perf_counter()
+    scalar = []
+    for snapshot in snapshots:
+        game.board.restore(snapshot)
+        scalar.append(game.evaluate_position())
+    scalar_seconds = time.perf_counter() - start
+    sample_mismatches = int((np.array(scalar) != values[:sample]).sum())
+
+    print(f"vectorized: {args.positions} positions in {vector_seconds:.2f}s "
+          f"({args.positions / vector_seconds / 1e6:.2f}M/s)")
+    print(f"scalar:     {sample} positions in {scalar_seconds:.2f}s "
+          f"({sample / scalar_seconds / 1e6:.2f}M/s), {sample_mismatches} mismatches")
+    sys.exit(1 if mismatches or sample_mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
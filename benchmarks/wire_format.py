@@ -0,0 +1,100 @@
+"""Response size and serialization time of the full and compact game state formats.
+
+For games after a number of random moves, compares the full GameResponse
+(built and rendered as FastAPI does for a response_model) with the compact
+wire format encoded by wire.dumps, both as a whole board and as the changes
+of the last two plies. Then times GET /api/game/{id} through the app in both
+formats. Run from the repository root:
+
+    python -m benchmarks.wire_format [--games 200] [--requests 2000]
+"""
+import argparse
+import os
+import random
+import time
+import uuid
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+
+from three_mens_morris import ThreeMensMorris
+from wire import compact_state, dumps, orjson
+
+PLIES = (0, 6, 20)
+
+
+def random_game(plies, rng):
+    game = ThreeMensMorris(human_first=rng.random() < 0.5)
+    for _ in range(plies):
+        if game.is_game_over()[0]:
+            break
+        game.make_move(rng.choice(game.get_valid_moves(game.current_player)))
+    return game
+
+
+def full_response(game_id, game, message, game_over, winner):
+    # Imported here so the module loads without starting the app
+    from app import GameResponse
+    content = GameResponse(game_id=game_id, state=game.to_dict(), message=message,
+                           game_over=game_over, winner=winner)
+    return JSONResponse(jsonable_encoder(content)).body
+
+
+def compact_response(game_id, game, message, game_over, winner, since=None):
+    return Response(dumps(compact_state(game_id, game, message, game_over, winner, since)),
+                    media_type="application/json").body
+
+
+def per_call(function, items, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for args in items:
+            function(*args)
+    return (time.perf_counter() - start) / (repeat * len(items)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--games', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    # The app is imported below; keep AI searches inline and the game log off
+    os.environ.setdefault("AI_POOL_WORKERS", "0")
+    os.environ.setdefault("GAME_LOG_PATH", "")
+
+    rng = random.Random(args.seed)
+    print(f"JSON encoder: {'orjson' if orjson is not None else 'json'}")
+    for plies in PLIES:
+        items = []
+        for _ in range(args.games):
+            game = random_game(plies, rng)
+            game_over, winner = game.is_game_over()
+            items.append((str(uuid.uuid4()), game, "Current game state", game_over, winner))
+        deltas = [item + (max(0, len(item[1].history) - 2),) for item in items]
+
+        sizes = [sum(len(encode(*args)) for args in batch) / len(batch) for encode, batch in (
+            (full_response, items), (compact_response, items), (compact_response, deltas))]
+        times = [per_call(encode, batch, args.repeat) for encode, batch in (
+            (full_response, items), (compact_response, items), (compact_response, deltas))]
+        print(f"{plies} plies: full {sizes[0]:.0f} bytes in {times[0]:.1f} us, "
+              f"compact {sizes[1]:.0f} bytes in {times[1]:.1f} us, "
+              f"compact delta {sizes[2]:.0f} bytes in {times[2]:.1f} us")
+
+    # End to end through the ASGI app, including routing and the session store
+    from fastapi.testclient import TestClient
+    from app import app
+    client = TestClient(app)
+    game_id = client.post('/api/new-game', json={'difficulty': 'easy', 'human_first': True}).json()['game_id']
+    for label, url in (('full', f'/api/game/{game_id}'), ('compact', f'/api/game/{game_id}?format=compact')):
+        start = time.perf_counter()
+        for _ in range(args.requests):
+            size = len(client.get(url).content)
+        seconds = time.perf_counter() - start
+        print(f"GET {label}: {size} bytes, {seconds / args.requests * 1000:.3f} ms per request")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+"""Compact bitboard representation of a Three Men's Morris position.
+
+Each side's pieces are stored as a 9-bit integer (bit 0 is square 'a',
+bit 8 is square 'i'), so move generation, win detection and make/unmake
+are plain integer operations with no per-node allocation.
+"""
+import random
+
+from rules import RULES
+
+SQUARES = RULES.squares
+SQUARE_BITS = {sq: 1 << i for i, sq in enumerate(SQUARES)}
+FULL_BOARD = (1 << len(SQUARES)) - 1
+
+ADJACENCY = RULES.adjacency
+WINNING_COMBINATIONS = RULES.winning_combinations
+
+BLUE, RED = 0, 1
+PLAYERS = ('blue', 'red')
+PLAYER_INDEX = {'blue': BLUE, 'red': RED}
+MAX_PIECES = RULES.max_pieces
+CENTER = SQUARE_BITS['e']
+
+WIN_MASKS = tuple(sum(SQUARE_BITS[sq] for sq in combo) for combo in WINNING_COMBINATIONS)
+ADJACENT_MASKS = tuple(sum(SQUARE_BITS[n] for n in ADJACENCY[sq]) for sq in SQUARES)
+POPCOUNT = tuple(bin(bits).count('1') for bits in range(FULL_BOARD + 1))
+# TERNARY[bits] is the base-3 weight of a piece set with digit 1 per square;
+# a position's index is TERNARY[blue] + 2 * TERNARY[red]
+TERNARY = tuple(
+    sum(3 ** i for i in range(len(SQUARES)) if bits >> i & 1) for bits in range(FULL_BOARD + 1)
+)
+POSITION_COUNT = 3 ** len(SQUARES)
+# HAS_MILL[bits] is True when the pieces in `bits` complete any winning line
+HAS_MILL = tuple(any(bits & mask == mask for mask in WIN_MASKS) for bits in range(FULL_BOARD + 1))
+
+# Engine moves are (from_mask, to_mask) pairs; placements have from_mask == 0.
+# They are generated in the same 'abcdefghi' / adjacency order as the public API.
+PLACE_MOVES = tuple((0, SQUARE_BITS[sq]) for sq in SQUARES)
+STEP_MOVES = tuple(
+    tuple((SQUARE_BITS[sq], SQUARE_BITS[n]) for n in ADJACENCY[sq]) for sq in SQUARES
+)
+MOVE_TUPLES = {(0, SQUARE_BITS[sq]): ('place', sq) for sq in SQUARES}
+MOVE_TUPLES.update({
+    (SQUARE_BITS[sq], SQUARE_BITS[n]): ('move', sq, n) for sq in SQUARES for n in ADJACENCY[sq]
+})
+MOVE_MASKS = {move: masks for masks, move in MOVE_TUPLES.items()}
+
+
+def _zobrist_table(rng):
+    keys = [rng.getrandbits(64) for _ in SQUARES]
+    table = [0] * (FULL_BOARD + 1)
+    for bits in range(1, FULL_BOARD + 1):
+        low = bits & -bits
+        table[bits] = table[bits ^ low] ^ keys[low.bit_length() - 1]
+    return tuple(table)
+
+
+# Zobrist keys: ZOBRIST[player][bits] is the XOR of that player's per-square keys,
+# so moving a piece updates the hash with one lookup of from_mask | to_mask
+_zobrist_rng = random.Random(0x3E3)
+ZOBRIST = (_zobrist_table(_zobrist_rng), _zobrist_table(_zobrist_rng))
+TURN_KEYS = (0, _zobrist_rng.getrandbits(64))
+# Mixed into search keys whose scores are relative to a fixed AI color
+AI_SIDE_KEYS = (0, _zobrist_rng.getrandbits(64))
+
+# Everything push and pop change for a move, per player: the squares it
+# flips, whether it is a placement, and the hash and index deltas
+MOVE_DELTAS = {
+    move: (
+        move[0] | move[1],
+        not move[0],
+        tuple(ZOBRIST[player][move[0] | move[1]] for player in (BLUE, RED)),
+        tuple((TERNARY[move[1]] - TERNARY[move[0]]) * (player + 1) for player in (BLUE, RED)),
+    )
+    for move in MOVE_TUPLES
+}
+
+
+class BitBoard:
+    """Mutable game state: two 9-bit piece sets, side to move and placement counters.
+
+    `hash` (the Zobrist hash of the piece sets) and `index` (the base-3
+    position index) are kept up to date by every mutating method;
+    TURN_KEYS[turn] is mixed in by callers that need it.
+    """
+
+    __slots__ = ('pieces', 'turn', 'placed', 'hash', 'index')
+
+    def __init__(self, turn=BLUE):
+        self.pieces = [0, 0]
+        self.turn = turn
+        self.placed = [0, 0]
+        self.hash = 0
+        self.index = 0
+
+    def copy(self):
+        board = BitBoard(self.turn)
+        board.pieces[:] = self.pieces
+        board.placed[:] = self.placed
+        board.hash = self.hash
+        board.index = self.index
+        return board
+
+    def snapshot(self):
+        return (self.pieces[BLUE], self.pieces[RED], self.turn, self.placed[BLUE], self.placed[RED])
+
+    def restore(self, snapshot):
+        self.pieces[BLUE], self.pieces[RED], self.turn, self.placed[BLUE], self.placed[RED] = snapshot
+        self.hash = ZOBRIST[BLUE][self.pieces[BLUE]] ^ ZOBRIST[RED][self.pieces[RED]]
+        self.index = TERNARY[self.pieces[BLUE]] + 2 * TERNARY[self.pieces[RED]]
+
+    def toggle(self, player, mask):
+        """Flip `player`'s occupancy of the squares in `mask`"""
+        before = self.pieces[player]
+        self.pieces[player] = before ^ mask
+        self.hash ^= ZOBRIST[player][mask]
+        self.index += (TERNARY[before ^ mask] - TERNARY[before]) * (player + 1)
+
+    @property
+    def occupied(self):
+        return self.pieces[BLUE] | self.pieces[RED]
+
+    @property
+    def movement(self):
+        return self.placed[BLUE] == MAX_PIECES and self.placed[RED] == MAX_PIECES
+
+    def winner(self):
+        """Index of the player owning a complete line, or None"""
+        if HAS_MILL[self.pieces[BLUE]]:
+            return BLUE
+        if HAS_MILL[self.pieces[RED]]:
+            return RED
+        return None
+
+    def can_move(self, player):
+        """Whether `player` has at least one sliding move"""
+        empty = FULL_BOARD ^ (self.pieces[BLUE] | self.pieces[RED])
+        bits = self.pieces[player]
+        while bits:
+            low = bits & -bits
+            if ADJACENT_MASKS[low.bit_length() - 1] & empty:
+                return True
+            bits ^= low
+        return False
+
+    def moves(self, player):
+        """Legal (from_mask, to_mask) moves for `player` in generation order"""
+        occupied = self.pieces[BLUE] | self.pieces[RED]
+        if not self.movement:
+            return [move for move in PLACE_MOVES if not occupied & move[1]]
+        own = self.pieces[player]
+        return [
+            move
+            for index, steps in enumerate(STEP_MOVES) if own >> index & 1
+            for move in steps if not occupied & move[1]
+        ]
+
+    def push(self, move):
+        """Apply a known-legal move for the side to move and pass the turn.
+
+        No legality checks: this is the search's make-move, and `move` itself
+        is the undo record for pop.
+        """
+        player = self.turn
+        mask, placing, keys, deltas = MOVE_DELTAS[move]
+        self.pieces[player] ^= mask
+        self.hash ^= keys[player]
+        self.index += deltas[player]
+        if placing:
+            self.placed[player] += 1
+        self.turn = player ^ 1
+
+    def pop(self, move):
+        """Revert a move previously applied with push"""
+        player = self.turn ^ 1
+        mask, placing, keys, deltas = MOVE_DELTAS[move]
+        self.turn = player
+        self.pieces[player] ^= mask
+        self.hash ^= keys[player]
+        self.index -= deltas[player]
+        if placing:
+            self.placed[player] -= 1
+
+    def search_outcome(self):
+        """Winner index of a position reached by push, or None if play continues"""
+        winner = self.winner()
+        if winner is not None:
+            return winner
+        if self.movement:
+            # The side that just moved may have blocked itself in
+            if not self.can_move(self.turn ^ 1):
+                return self.turn
+            if not self.can_move(self.turn):
+                return self.turn ^ 1
+        return None
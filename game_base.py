@@ -0,0 +1,194 @@
+"""Per-game session logic shared by ThreeMensMorris and MorrisGame"""
+import random
+import time
+from array import array
+
+from bitboard import PLAYERS, PLAYER_INDEX
+
+SYMBOLS = {None: '.', 'blue': 'B', 'red': 'R'}
+
+# Per variant name, the (column, row) of each square, row 0 at the top
+_layouts = {}
+
+
+def board_layout(rules):
+    """Grid coordinates of `rules`' squares.
+
+    Squares named by a file letter and a rank number ("a1", "d7") sit at
+    those coordinates, rank 1 at the bottom; other boards are filled row by
+    row from the top left, like a-i on the Three Men's Morris board.
+    """
+    layout = _layouts.get(rules.name)
+    if layout is None:
+        squares = rules.squares
+        if all(len(sq) > 1 and sq[1:].isdigit() for sq in squares):
+            top = max(int(sq[1:]) for sq in squares)
+            layout = {sq: (ord(sq[0]) - ord('a'), top - int(sq[1:])) for sq in squares}
+        else:
+            width = round(len(squares) ** 0.5)
+            layout = {sq: (i % width, i // width) for i, sq in enumerate(squares)}
+        _layouts[rules.name] = layout
+    return layout
+
+
+def render_text(rules, positions):
+    """`positions` drawn as text: B and R pieces, . for empty points and the lines between them"""
+    layout = board_layout(rules)
+    width = max(x for x, _ in layout.values())
+    height = max(y for _, y in layout.values())
+    # Points are four characters apart across and two lines apart down
+    canvas = [[' '] * (4 * width + 1) for _ in range(2 * height + 1)]
+    for sq, (x, y) in layout.items():
+        for neighbour in rules.adjacency[sq]:
+            nx, ny = layout[neighbour]
+            if (ny, nx) < (y, x):
+                continue  # Drawn from the other end
+            if ny == y:
+                for column in range(4 * x + 1, 4 * nx):
+                    canvas[2 * y][column] = '-'
+            elif nx == x:
+                for line in range(2 * y + 1, 2 * ny):
+                    canvas[line][4 * x] = '|'
+            else:
+                canvas[2 * y + 1][4 * x + 2 * (nx - x)] = '\\' if nx > x else '/'
+        canvas[2 * y][4 * x] = SYMBOLS[positions[sq]]
+    return '\n'.join(''.join(line).rstrip() for line in canvas)
+
+
+class BaseGame:
+    """Players, difficulty, move history and serialization of one game.
+
+    Subclasses provide `rules`, `square_bits`, the difficulty settings and
+    `_new_board(turn)`, plus the rules-specific move methods.
+    """
+
+    __slots__ = (
+        'board', 'human_player', 'ai_player', 'difficulty', 'search_depth', 'time_budget', 'engine',
+        'tree_cache', 'first_player', 'history', 'move_times', 'started', 'moved_at'
+    )
+
+    def __init__(self, difficulty='medium', human_first=None, time_budget=None, engine='minimax', tree_cache=None):
+        # MCTS subtrees kept between moves (None: mcts.shared_trees)
+        self.tree_cache = tree_cache
+
+        # Randomly decide who goes first if not specified
+        if human_first is None:
+            human_first = random.choice([True, False])
+
+        self.human_player = 'blue'  # Blue for human
+        self.ai_player = 'red'      # Red for AI
+        self.board = self._new_board(PLAYER_INDEX[self.human_player if human_first else self.ai_player])
+
+        self.difficulty = difficulty
+        self.search_depth = self.difficulty_depths.get(difficulty, 4)
+        self.time_budget = time_budget if time_budget is not None else \
+            self.difficulty_time_budgets.get(difficulty, 1.0)
+        # 'minimax' (alpha-beta search) or 'mcts' (Monte Carlo tree search)
+        self.engine = engine
+        # Every move played, and the milliseconds each took since the previous one
+        self.first_player = self.current_player
+        self.history = []
+        self.move_times = array('I')
+        self.started = self.moved_at = time.time()
+
+    @property
+    def positions(self):
+        blue, red = self.board.pieces
+        return {
+            sq: 'blue' if blue & bit else 'red' if red & bit else None
+            for sq, bit in self.square_bits.items()
+        }
+
+    @property
+    def phase(self):
+        return 'movement' if self.board.movement else 'placement'
+
+    @property
+    def current_player(self):
+        return PLAYERS[self.board.turn]
+
+    @current_player.setter
+    def current_player(self, player):
+        self.board.turn = PLAYER_INDEX[player]
+
+    @property
+    def pieces_placed(self):
+        return {'blue': self.board.placed[0], 'red': self.board.placed[1]}
+
+    def _record(self, move):
+        """Add `move` to the history with the time since the previous move"""
+        now = time.time()
+        self.history.append(move)
+        self.move_times.append(max(0, round((now - self.moved_at) * 1000)))
+        self.moved_at = now
+
+    def render_board(self):
+        """The board as text, for the command line"""
+        return render_text(self.rules, self.positions)
+
+    def make_move(self, move):
+        """Make a move and return the previous state for undo"""
+        prev_state = self.board.snapshot()
+
+        if move[0] == 'place':
+            self.place_piece(*move[1:])
+        else:  # move
+            self.move_piece(*move[1:])
+
+        return prev_state
+
+    def undo_move(self, prev_state):
+        """Undo a move by restoring previous state"""
+        self.board.restore(prev_state)
+        self.history.pop()
+        self.move_times.pop()
+
+    def to_dict(self, include_history=False):
+        """Convert game state to dictionary for JSON serialization.
+
+        The move history and timings are only included with `include_history`,
+        for the session store: API responses and worker jobs need the position
+        alone, and it does not grow with the game.
+        """
+        state = {
+            'positions': self.positions,
+            'phase': self.phase,
+            'current_player': self.current_player,
+            'pieces_placed': self.pieces_placed,
+            'difficulty': self.difficulty,
+            'human_player': self.human_player,
+            'ai_player': self.ai_player,
+            'time_budget': self.time_budget,
+            'engine': self.engine
+        }
+        if include_history:
+            state.update(
+                first_player=self.first_player,
+                started=self.started,
+                history=self.history,
+                move_times=self.move_times.tolist()
+            )
+        return state
+
+    def from_dict(self, data):
+        """Restore game state from dictionary"""
+        bits = self.square_bits
+        positions = data['positions']
+        blue = sum(bits[sq] for sq, player in positions.items() if player == 'blue')
+        red = sum(bits[sq] for sq, player in positions.items() if player == 'red')
+        turn = PLAYER_INDEX[data['current_player']]
+        board = self._new_board(turn)
+        board.restore((blue, red, turn, data['pieces_placed']['blue'], data['pieces_placed']['red']))
+        self.board = board
+        self.difficulty = data['difficulty']
+        self.human_player = data['human_player']
+        self.ai_player = data['ai_player']
+        self.search_depth = self.difficulty_depths.get(self.difficulty, 4)
+        self.time_budget = data.get('time_budget', self.difficulty_time_budgets.get(self.difficulty, 1.0))
+        self.engine = data.get('engine', 'minimax')
+        self.history = [tuple(move) for move in data.get('history', ())]
+        self.move_times = array('I', data.get('move_times', ()))
+        # Moves alternate, so without a history the player to move counts as first
+        self.first_player = data.get('first_player', self.current_player)
+        self.started = data.get('started', time.time())
+        self.moved_at = self.started + sum(self.move_times) / 1000
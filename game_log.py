@@ -0,0 +1,290 @@
+"""Append-only binary log of played games, with a streaming reader for replay and analytics.
+
+Each record is a 4-byte little-endian length followed by the payload:
+
+    B    format version (1)
+    16s  game id (UUID bytes)
+    d    start time (Unix seconds)
+    B    human player, B first player, B winner (0 blue, 1 red, 2 unfinished)
+    H    number of moves n
+    then the variant, difficulty and engine names (each a B length and UTF-8),
+    3n bytes of moves as (from, to, removed) square numbers, 1-based with
+    0 for none, and n little-endian uint32 milliseconds since the previous move.
+
+A Three Men's Morris game of 20 moves takes about 200 bytes.
+"""
+import argparse
+import atexit
+import os
+import queue
+import struct
+import sys
+import threading
+import uuid
+from array import array
+from typing import NamedTuple, Optional, Tuple
+
+from bitboard import PLAYER_INDEX, PLAYERS
+from morris import create_game
+from rules import VARIANTS
+
+VERSION = 1
+LENGTH = struct.Struct('<I')
+HEADER = struct.Struct('<B16sdBBBH')
+UNFINISHED = 2
+MAX_MS = 2 ** 32 - 1
+
+
+class GameRecord(NamedTuple):
+    game_id: str
+    variant: str
+    difficulty: str
+    engine: str
+    human_player: str
+    first_player: str
+    started: float
+    winner: Optional[str]  # None for games left unfinished
+    moves: Tuple[tuple, ...]  # In the get_valid_moves format
+    times: Tuple[int, ...]  # Milliseconds each move took since the previous one
+
+
+# Per variant, the 3-byte code of each move seen so far and the move of each code
+_move_codes = {}
+_code_moves = {}
+
+
+def _move_code(variant, move):
+    codes = _move_codes.setdefault(variant, {})
+    code = codes.get(move)
+    if code is None:
+        number = {sq: i for i, sq in enumerate(VARIANTS[variant].squares, 1)}
+        squares = (None,) + move[1:] if move[0] == 'place' else move[1:]
+        code = codes[move] = bytes(number.get(sq, 0) for sq in squares + (None,) * (3 - len(squares)))
+    return code
+
+
+def _code_move(variant, code):
+    moves = _code_moves.setdefault(variant, {})
+    move = moves.get(code)
+    if move is None:
+        squares = (None,) + tuple(VARIANTS[variant].squares)
+        frm, to, removed = code
+        move = ('place', squares[to]) if not frm else ('move', squares[frm], squares[to])
+        move = moves[code] = move + (squares[removed],) if removed else move
+    return move
+
+
+def _name(text):
+    data = text.encode()
+    return bytes((len(data),)) + data
+
+
+def encode_record(record):
+    """Length-prefixed binary form of a GameRecord"""
+    codes = _move_codes.get(record.variant, {})
+    moves = b''.join([codes.get(move) or _move_code(record.variant, move) for move in record.moves])
+    try:
+        times = array('I', record.times)
+    except OverflowError:
+        times = array('I', [min(max(ms, 0), MAX_MS) for ms in record.times])
+    if sys.byteorder == 'big':
+        times.byteswap()
+    winner = UNFINISHED if record.winner is None else PLAYER_INDEX[record.winner]
+    payload = b''.join((
+        HEADER.pack(VERSION, uuid.UUID(record.game_id).bytes, record.started, PLAYER_INDEX[record.human_player],
+                    PLAYER_INDEX[record.first_player], winner, len(record.moves)),
+        _name(record.variant), _name(record.difficulty), _name(record.engine), moves, times.tobytes()
+    ))
+    return LENGTH.pack(len(payload)) + payload
+
+
+def decode_record(payload):
+    """GameRecord from a payload written by encode_record"""
+    version, game_id, started, human, first, winner, count = HEADER.unpack_from(payload)
+    if version != VERSION:
+        raise ValueError(f"Unsupported game log version {version}")
+    offset = HEADER.size
+    names = []
+    for _ in range(3):
+        size = payload[offset]
+        names.append(payload[offset + 1:offset + 1 + size].decode())
+        offset += 1 + size
+    variant, difficulty, engine = names
+
+    known = _code_moves.get(variant, {})
+    numbers = iter(payload[offset:offset + 3 * count])
+    moves = tuple([known.get(code) or _code_move(variant, code) for code in zip(numbers, numbers, numbers)])
+    times = array('I', payload[offset + 3 * count:offset + 7 * count])
+    if sys.byteorder == 'big':
+        times.byteswap()
+    return GameRecord(
+        str(uuid.UUID(bytes=game_id)), variant, difficulty, engine, PLAYERS[human], PLAYERS[first], started,
+        None if winner == UNFINISHED else PLAYERS[winner], moves, tuple(times)
+    )
+
+
+def record_from_game(game_id, game, winner=None):
+    """GameRecord of a ThreeMensMorris or MorrisGame and its history; `winner` None if unfinished"""
+    return GameRecord(
+        game_id, game.rules.name, game.difficulty, game.engine, game.human_player, game.first_player,
+        game.started, winner, tuple(game.history), tuple(game.move_times)
+    )
+
+
+class GameLog:
+    """Appends game records to `path` from a background thread.
+
+    `append` only encodes the record and queues it, so it is cheap enough for
+    the request path. The writer thread collects up to `batch_size` records,
+    or whatever arrived within `flush_interval` seconds, and writes them with
+    a single write call on a file opened for appending, so several worker
+    processes can share one log without interleaving records.
+    """
+
+    def __init__(self, path, batch_size=256, flush_interval=1.0):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.records = 0
+        self.batches = 0
+        self._queue = queue.Queue()
+        self._fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        self._thread = threading.Thread(target=self._write_batches, name='game-log', daemon=True)
+        self._thread.start()
+        # Queued records are written even if the app exits without calling close
+        atexit.register(self.close)
+
+    def append(self, record):
+        self._queue.put(encode_record(record))
+
+    def append_game(self, game_id, game, winner=None):
+        self.append(record_from_game(game_id, game, winner))
+
+    def _write_batches(self):
+        pending = self._queue
+        while True:
+            batch = [pending.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(pending.get(timeout=self.flush_interval))
+                except queue.Empty:
+                    break
+            closing = batch[-1] is None
+            if closing:
+                batch.pop()
+            if batch:
+                data = b''.join(batch)
+                while data:
+                    data = data[os.write(self._fd, data):]
+                self.records += len(batch)
+                self.batches += 1
+            if closing:
+                return
+
+    def close(self):
+        """Write the queued records and stop the writer thread"""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+            os.close(self._fd)
+
+
+def read_records(path):
+    """Yield the GameRecords in the log at `path`, one at a time.
+
+    A record cut short at the end of the file (a writer that died mid-batch)
+    ends the iteration.
+    """
+    with open(path, 'rb', buffering=1 << 20) as log:
+        read = log.read
+        while True:
+            prefix = read(LENGTH.size)
+            if len(prefix) < LENGTH.size:
+                return
+            size, = LENGTH.unpack(prefix)
+            payload = read(size)
+            if len(payload) < size:
+                return
+            yield decode_record(payload)
+
+
+def replay(record):
+    """Yield (ply, game) after each move of `record`, starting from the empty board at ply 0.
+
+    The same game object is updated in place between plies; copy it with
+    to_dict to keep a position.
+    """
+    game = create_game(record.variant, difficulty=record.difficulty, engine=record.engine,
+                       human_first=record.first_player == record.human_player)
+    game.started = game.moved_at = record.started
+    yield 0, game
+    for ply, move in enumerate(record.moves, 1):
+        game.make_move(move)
+        yield ply, game
+
+
+def game_at(record, ply):
+    """The game of `record` after its first `ply` moves"""
+    for reached, game in replay(record):
+        if reached == ply:
+            return game
+    raise ValueError(f"Game {record.game_id} has only {len(record.moves)} moves")
+
+
+def summarize(records):
+    """Aggregate results per (variant, difficulty, engine) over an iterable of GameRecords"""
+    summary = {}
+    for record in records:
+        key = (record.variant, record.difficulty, record.engine)
+        totals = summary.get(key)
+        if totals is None:
+            totals = summary[key] = {
+                'games': 0, 'human_wins': 0, 'ai_wins': 0, 'unfinished': 0, 'moves': 0,
+                'human_moves': 0, 'human_ms': 0, 'ai_moves': 0, 'ai_ms': 0,
+            }
+        totals['games'] += 1
+        if record.winner is None:
+            totals['unfinished'] += 1
+        elif record.winner == record.human_player:
+            totals['human_wins'] += 1
+        else:
+            totals['ai_wins'] += 1
+        count = len(record.moves)
+        totals['moves'] += count
+        # Moves alternate from the first player
+        human_first = record.first_player == record.human_player
+        human = record.times[0 if human_first else 1::2]
+        totals['human_moves'] += len(human)
+        totals['human_ms'] += sum(human)
+        totals['ai_moves'] += count - len(human)
+        totals['ai_ms'] += sum(record.times) - sum(human)
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarize or replay a game log")
+    parser.add_argument('path')
+    parser.add_argument('--game', help="print the board after each move of this game id")
+    args = parser.parse_args(argv)
+
+    if args.game:
+        for record in read_records(args.path):
+            if record.game_id == args.game:
+                for ply, game in replay(record):
+                    print(f"Ply {ply}: {' '.join(record.moves[ply - 1]) if ply else 'start'}")
+                    print(game.render_board())
+                print(f"Winner: {record.winner or 'none (unfinished)'}")
+                return
+        sys.exit(f"Game {args.game} not found")
+
+    for (variant, difficulty, engine), totals in sorted(summarize(read_records(args.path)).items()):
+        games = totals['games']
+        print(f"{variant} {difficulty} {engine}: {games} games, human {totals['human_wins']} / "
+              f"AI {totals['ai_wins']} / unfinished {totals['unfinished']}, "
+              f"{totals['moves'] / games:.1f} moves per game, "
+              f"human {totals['human_ms'] / max(1, totals['human_moves']) / 1000:.1f}s "
+              f"and AI {totals['ai_ms'] / max(1, totals['ai_moves']) / 1000:.2f}s per move")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,243 @@
+"""Monte Carlo tree search (UCT) over any board with the BitBoard search interface.
+
+Unlike the alpha-beta search this is an anytime algorithm: every iteration
+refines the statistics, so strength follows the iteration or time budget
+smoothly. Each round selects `batch` new leaves (a virtual loss on every
+path keeps them apart) and plays `playouts` random games from each of them
+in one `simulate` call, which can run them all as one NumPy batch
+(vectorized.random_playouts); the default plays them one by one with push
+and pop on the board itself.
+"""
+import math
+import random
+import time
+from collections import OrderedDict
+
+from bitboard import BLUE, RED
+from rules import RULES
+
+
+class Node:
+    """A position in the tree, reached by `move` from `parent` by `player`"""
+
+    __slots__ = ('move', 'parent', 'player', 'children', 'untried', 'visits', 'wins', 'outcome')
+
+    def __init__(self, move, parent, player, untried, outcome=None):
+        self.move = move
+        self.parent = parent
+        self.player = player
+        self.children = []
+        self.untried = untried
+        self.visits = 0
+        # Playout results for `player`: 1 per win, 0.5 per draw
+        self.wins = 0.0
+        self.outcome = outcome
+
+
+class TreeCache:
+    """Search trees kept between moves, keyed by the position they start from.
+
+    After a search, the subtree after each of the opponent's replies to the
+    chosen move is stored; the next search from the position the opponent
+    actually reached picks its subtree up, and its siblings are dropped.
+    At most `max_entries` subtrees are kept, least recently stored first out.
+    """
+
+    def __init__(self, max_entries=4096):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def take(self, key):
+        """The subtree stored for `key`, forgetting it and its siblings, or None"""
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        node, siblings = entry
+        for sibling in siblings:
+            self.entries.pop(sibling, None)
+        node.parent = None
+        return node
+
+    def put_replies(self, keys, nodes):
+        """Store sibling subtrees `nodes` under their position `keys`"""
+        siblings = tuple(keys)
+        for key, node in zip(keys, nodes):
+            self.entries[key] = (node, siblings)
+            self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+# Default cache used by games in this process, like transposition.shared_table
+shared_trees = TreeCache()
+
+
+class MCTS:
+    """UCT search from the current position of `board` for the side to move.
+
+    `simulate(snapshots, playouts, max_plies)` returns (blue wins, red wins,
+    draws) for each board snapshot, with games still running after
+    `max_plies` plies counted as draws. The default random playouts instead
+    score such games by `evaluate(board, BLUE)` when it is given: a win for
+    the side it favours, a draw at 0. Counters mirror Search's: `nodes`
+    tree nodes created, `leaves` playouts run, `depth` the deepest tree path.
+    """
+
+    def __init__(self, board, tree_cache=None, variant=RULES.name, exploration=1.4, playouts=8, batch=1,
+                 max_plies=60, simulate=None, evaluate=None):
+        self.board = board
+        self.tree_cache = tree_cache if tree_cache is not None else shared_trees
+        self.variant = variant
+        self.exploration = exploration
+        self.playouts = playouts
+        self.batch = batch
+        self.max_plies = max_plies
+        self.simulate = simulate if simulate is not None else self._random_playouts
+        self.evaluate = evaluate
+        self.nodes = 0
+        self.leaves = 0
+        self.cutoffs = 0
+        self.depth = 0
+        self.iterations = 0
+        self.reused = 0
+
+    def _new_node(self, move, parent):
+        board = self.board
+        outcome = board.search_outcome()
+        untried = None
+        if outcome is None:
+            untried = board.moves(board.turn)
+            random.shuffle(untried)
+        self.nodes += 1
+        return Node(move, parent, board.turn ^ 1, untried, outcome)
+
+    def run(self, iterations, deadline=None):
+        """Best move after `iterations` new leaves, or fewer if `deadline` passes first"""
+        board = self.board
+        root = self.tree_cache.take((self.variant, board.snapshot()))
+        if root is None:
+            root = self._new_node(None, None)
+        self.reused = root.visits
+
+        while self.iterations < iterations:
+            self._round(root, min(self.batch, iterations - self.iterations))
+            if deadline is not None and time.perf_counter() > deadline:
+                break
+
+        # The most visited move is the most robust choice; win rate breaks ties
+        best = max(root.children, key=lambda child: (child.visits, child.wins / child.visits))
+        self._keep_replies(best)
+        return best.move
+
+    def _round(self, root, leaves):
+        board = self.board
+        count = self.playouts
+        paths = []
+        snapshots = []
+
+        for _ in range(leaves):
+            node = root
+            path = [node]
+
+            # Selection: descend through fully expanded nodes by the UCT score
+            while not node.untried and node.children:
+                log_visits = math.log(node.visits)
+                exploration = self.exploration
+                node = max(node.children, key=lambda child: child.wins / child.visits +
+                           exploration * math.sqrt(log_visits / child.visits))
+                board.push(node.move)
+                path.append(node)
+
+            # Expansion
+            if node.untried:
+                move = node.untried.pop()
+                board.push(move)
+                child = self._new_node(move, node)
+                node.children.append(child)
+                node = child
+                path.append(node)
+
+            # Virtual loss: the pending playouts count as lost until their
+            # results are in, steering the rest of the batch elsewhere
+            for visited in path:
+                visited.visits += count
+            if node.outcome is None:
+                snapshots.append(board.snapshot())
+            paths.append(path)
+            self.depth = max(self.depth, len(path) - 1)
+            self.iterations += 1
+            for visited in reversed(path[1:]):
+                board.pop(visited.move)
+
+        # Simulation, then backpropagation; finished games need no playouts
+        results = iter(self.simulate(snapshots, count, self.max_plies) if snapshots else ())
+        self.leaves += count * len(snapshots)
+        for path in paths:
+            leaf = path[-1]
+            if leaf.outcome is None:
+                blue, red, draws = next(results)
+            else:
+                blue, red, draws = (count, 0, 0) if leaf.outcome == BLUE else (0, count, 0)
+            wins = (blue, red)
+            for visited in path:
+                visited.wins += wins[visited.player] + 0.5 * draws
+
+    def _random_playouts(self, snapshots, count, max_plies):
+        """simulate() by random games on the board itself"""
+        board = self.board
+        root = board.snapshot()
+        choice = random.choice
+        evaluate = self.evaluate
+        results = []
+        for snapshot in snapshots:
+            board.restore(snapshot)
+            wins = [0, 0]
+            draws = 0
+            for _ in range(count):
+                played = []
+                winner = None
+                for _ in range(max_plies):
+                    move = choice(board.moves(board.turn))
+                    board.push(move)
+                    played.append(move)
+                    winner = board.search_outcome()
+                    if winner is not None:
+                        break
+                if winner is None and evaluate is not None:
+                    score = evaluate(board, BLUE)
+                    winner = BLUE if score > 0 else RED if score < 0 else None
+                for move in reversed(played):
+                    board.pop(move)
+                if winner is None:
+                    draws += 1
+                else:
+                    wins[winner] += 1
+            results.append((wins[0], wins[1], draws))
+        board.restore(root)
+        return results
+
+    def _keep_replies(self, best):
+        """Hand the subtrees after each reply to `best` to the tree cache"""
+        board = self.board
+        board.push(best.move)
+        keys = []
+        for reply in best.children:
+            board.push(reply.move)
+            keys.append((self.variant, board.snapshot()))
+            board.pop(reply.move)
+        board.pop(best.move)
+        # Detach the chosen move so the rest of this tree can be freed
+        best.parent = None
+        self.tree_cache.put_replies(keys, best.children)
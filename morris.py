@@ -0,0 +1,460 @@
+"""Engine and game for any Morris variant described by a Rules.
+
+Three Men's Morris keeps its own table-driven BitBoard, tablebase and
+opening book. Larger boards (Six and Nine Men's Morris have 16 and 24
+points, so 3**24 positions) cannot be tabulated like that, so MorrisBoard
+works square by square instead: per-square Zobrist keys, per-square
+neighbour and mill lists, and only the mills through the destination
+square are checked when a piece lands. It has the BitBoard search
+interface, so the same Search (with a transposition table per variant)
+plays every variant.
+"""
+import random
+import time
+
+from bitboard import BLUE, PLAYERS, PLAYER_INDEX, RED
+from game_base import BaseGame
+from mcts import MCTS
+from rules import RULES, VARIANTS
+from search import WIN_SCORE, Search
+from three_mens_morris import ThreeMensMorris, _fill_mcts_stats, _fill_stats
+from transposition import TranspositionTable
+
+
+class Topology:
+    """Lookup tables for one variant's board, built once per variant"""
+
+    def __init__(self, rules):
+        self.rules = rules
+        self.pieces = rules.max_pieces
+        self.captures = rules.captures
+        self.blocked_mover_loses = rules.blocked_mover_loses
+        self.flying = rules.flying
+        self.squares = tuple(rules.squares)
+        self.square_bits = {sq: 1 << i for i, sq in enumerate(self.squares)}
+        self.names = {bit: sq for sq, bit in self.square_bits.items()}
+        self.bits = tuple(self.square_bits.values())
+        self.full = (1 << len(self.squares)) - 1
+        # NEIGHBOURS[bit] in adjacency order; MILLS_AT[bit] is every mill through that square
+        self.neighbours = {
+            self.square_bits[sq]: tuple(self.square_bits[n] for n in rules.adjacency[sq]) for sq in self.squares
+        }
+        self.adjacent = {bit: sum(neighbours) for bit, neighbours in self.neighbours.items()}
+        self.mills = tuple(sum(self.square_bits[sq] for sq in mill) for mill in rules.winning_combinations)
+        self.mills_at = {bit: tuple(mask for mask in self.mills if mask & bit) for bit in self.bits}
+        self.move_tuples = {}
+
+        # Zobrist keys per player and square (key 0 for the empty mask), plus
+        # keys for each placement counter step, since captures make the same
+        # piece sets reachable with different numbers of pieces in hand
+        rng = random.Random(f'{rules.name}/zobrist')
+        self.keys = tuple({0: 0, **{bit: rng.getrandbits(64) for bit in self.bits}} for _ in PLAYERS)
+        self.placed_keys = tuple(tuple(rng.getrandbits(64) for _ in range(self.pieces)) for _ in PLAYERS)
+
+        # Heuristic weights, chosen so a score never reaches WIN_SCORE
+        if self.captures:
+            self.line_values = (2, 10)
+            self.material = 40
+        else:
+            self.line_values = (10, 50)
+            self.material = 0
+
+    def move_tuple(self, move):
+        """Public move tuple for an engine (from_mask, to_mask, capture_mask) move, shared between calls"""
+        public = self.move_tuples.get(move)
+        if public is None:
+            frm, to, capture = move
+            names = self.names
+            squares = ('place', names[to]) if not frm else ('move', names[frm], names[to])
+            public = self.move_tuples[move] = squares + (names[capture],) if capture else squares
+        return public
+
+
+_topologies = {}
+
+
+def get_topology(rules):
+    """The shared Topology of `rules`"""
+    topology = _topologies.get(rules.name)
+    if topology is None:
+        topology = _topologies[rules.name] = Topology(rules)
+    return topology
+
+
+class MorrisBoard:
+    """Mutable game state of any variant, with the BitBoard search interface.
+
+    Moves are (from_mask, to_mask, capture_mask) triples; placements have
+    from_mask == 0 and moves that remove no piece have capture_mask == 0.
+    """
+
+    __slots__ = ('topology', 'pieces', 'turn', 'placed', 'hash')
+
+    def __init__(self, topology, turn=BLUE):
+        self.topology = topology
+        self.pieces = [0, 0]
+        self.turn = turn
+        self.placed = [0, 0]
+        self.hash = 0
+
+    def snapshot(self):
+        return (self.pieces[BLUE], self.pieces[RED], self.turn, self.placed[BLUE], self.placed[RED])
+
+    def restore(self, snapshot):
+        self.pieces[BLUE], self.pieces[RED], self.turn, self.placed[BLUE], self.placed[RED] = snapshot
+        topology = self.topology
+        key = 0
+        for player in (BLUE, RED):
+            keys = topology.keys[player]
+            for bit in topology.bits:
+                if self.pieces[player] & bit:
+                    key ^= keys[bit]
+            for count in range(self.placed[player]):
+                key ^= topology.placed_keys[player][count]
+        self.hash = key
+
+    @property
+    def occupied(self):
+        return self.pieces[BLUE] | self.pieces[RED]
+
+    @property
+    def movement(self):
+        pieces = self.topology.pieces
+        return self.placed[BLUE] == pieces and self.placed[RED] == pieces
+
+    def placing(self, player):
+        """Whether `player` still has pieces in hand"""
+        return self.placed[player] < self.topology.pieces
+
+    def flying(self, player):
+        """Whether `player` may move to any empty square"""
+        return self.topology.flying and not self.placing(player) and self.pieces[player].bit_count() == 3
+
+    def can_move(self, player):
+        """Whether `player` has at least one move in the movement phase"""
+        topology = self.topology
+        empty = topology.full ^ (self.pieces[BLUE] | self.pieces[RED])
+        if self.flying(player):
+            return empty != 0
+        bits = self.pieces[player]
+        while bits:
+            low = bits & -bits
+            if topology.adjacent[low] & empty:
+                return True
+            bits ^= low
+        return False
+
+    def closes_mill(self, player, frm, to):
+        """Whether moving `player`'s piece from `frm` (0 to place) to `to` completes a mill"""
+        after = self.pieces[player] ^ frm | to
+        return any(after & mask == mask for mask in self.topology.mills_at[to])
+
+    def removable(self, player):
+        """Squares of `player`'s pieces a mill may remove: those outside mills, or any if none are"""
+        own = self.pieces[player]
+        in_mills = 0
+        for mask in self.topology.mills:
+            if own & mask == mask:
+                in_mills |= mask
+        return own & ~in_mills or own
+
+    def moves(self, player):
+        """Legal (from_mask, to_mask, capture_mask) moves for `player`"""
+        topology = self.topology
+        own = self.pieces[player]
+        empty = topology.full ^ (own | self.pieces[player ^ 1])
+        if self.placing(player):
+            steps = [(0, bit) for bit in topology.bits if empty & bit]
+        elif self.flying(player):
+            targets = [bit for bit in topology.bits if empty & bit]
+            steps = [(bit, to) for bit in topology.bits if own & bit for to in targets]
+        else:
+            neighbours = topology.neighbours
+            steps = [(bit, to) for bit in topology.bits if own & bit for to in neighbours[bit] if empty & to]
+        if not topology.captures:
+            return [(frm, to, 0) for frm, to in steps]
+
+        # Mill-closing moves come first, one per piece they may remove, so
+        # the search tries them before quiet moves
+        mills_at = topology.mills_at
+        closing, quiet = [], []
+        victims = None
+        for frm, to in steps:
+            after = own ^ frm | to
+            if any(after & mask == mask for mask in mills_at[to]):
+                if victims is None:
+                    removable = self.removable(player ^ 1)
+                    victims = [bit for bit in topology.bits if removable & bit]
+                closing.extend((frm, to, bit) for bit in victims)
+            else:
+                quiet.append((frm, to, 0))
+        return closing + quiet
+
+    def push(self, move):
+        """Apply a known-legal move for the side to move and pass the turn"""
+        frm, to, capture = move
+        player = self.turn
+        topology = self.topology
+        keys = topology.keys[player]
+        self.pieces[player] ^= frm | to
+        key = self.hash ^ keys[frm] ^ keys[to]
+        if not frm:
+            key ^= topology.placed_keys[player][self.placed[player]]
+            self.placed[player] += 1
+        if capture:
+            self.pieces[player ^ 1] ^= capture
+            key ^= topology.keys[player ^ 1][capture]
+        self.hash = key
+        self.turn = player ^ 1
+
+    def pop(self, move):
+        """Revert a move previously applied with push"""
+        frm, to, capture = move
+        player = self.turn ^ 1
+        topology = self.topology
+        keys = topology.keys[player]
+        self.turn = player
+        self.pieces[player] ^= frm | to
+        key = self.hash ^ keys[frm] ^ keys[to]
+        if not frm:
+            self.placed[player] -= 1
+            key ^= topology.placed_keys[player][self.placed[player]]
+        if capture:
+            self.pieces[player ^ 1] ^= capture
+            key ^= topology.keys[player ^ 1][capture]
+        self.hash = key
+
+    def search_outcome(self):
+        """Winner index, or None if play continues, by the same rules as BitBoard.search_outcome.
+
+        Without captures a mill wins; with captures a player who has placed
+        every piece and is left with fewer than three loses. Either way the
+        player to move loses if they have no move in the movement phase, and
+        with rules.blocked_mover_loses so does a player who just moved and
+        has none.
+        """
+        topology = self.topology
+        pieces = self.pieces
+        if topology.captures:
+            for player in (BLUE, RED):
+                if pieces[player].bit_count() < 3 and not self.placing(player):
+                    return player ^ 1
+        else:
+            for player in (BLUE, RED):
+                own = pieces[player]
+                for mask in topology.mills:
+                    if own & mask == mask:
+                        return player
+        if self.movement:
+            # The side that just moved may have blocked itself in
+            if topology.blocked_mover_loses and not self.can_move(self.turn ^ 1):
+                return self.turn
+            if not self.can_move(self.turn):
+                return self.turn ^ 1
+        return None
+
+
+def heuristic(board, ai):
+    """Line and material score of a non-terminal position for the AI"""
+    topology = board.topology
+    ai_bits = board.pieces[ai]
+    human_bits = board.pieces[ai ^ 1]
+    one, two = topology.line_values
+    score = 0
+
+    # Lines held by one side only, worth more with two or three pieces on them
+    for mask in topology.mills:
+        ai_line = ai_bits & mask
+        human_line = human_bits & mask
+        if not human_line:
+            if ai_line:
+                score += two if ai_line & (ai_line - 1) else one
+        elif not ai_line:
+            score -= two if human_line & (human_line - 1) else one
+
+    # Pieces on the board plus pieces still in hand
+    if topology.material:
+        pieces = topology.pieces
+        ai_material = ai_bits.bit_count() + pieces - board.placed[ai]
+        human_material = human_bits.bit_count() + pieces - board.placed[ai ^ 1]
+        score += topology.material * (ai_material - human_material)
+
+    return score
+
+
+# One transposition table per variant, shared by all of its games like
+# transposition.shared_table is for Three Men's Morris
+_tables = {}
+
+
+def shared_variant_table(rules):
+    table = _tables.get(rules.name)
+    if table is None:
+        table = _tables[rules.name] = TranspositionTable()
+    return table
+
+
+class MorrisGame(BaseGame):
+    """A game of any variant, with the ThreeMensMorris interface.
+
+    Moves that close a mill in a variant with captures also name the
+    opponent piece to remove: ('place', sq, removed) or ('move', from, to, removed).
+    """
+
+    __slots__ = ('rules', 'topology', 'transposition_table')
+
+    def __init__(self, rules, difficulty='medium', human_first=None, transposition_table=None, time_budget=None,
+                 engine='minimax', tree_cache=None):
+        self.rules = rules
+        self.topology = get_topology(rules)
+        self.transposition_table = transposition_table if transposition_table is not None else \
+            shared_variant_table(rules)
+        super().__init__(difficulty, human_first, time_budget, engine, tree_cache)
+
+    def _new_board(self, turn):
+        return MorrisBoard(self.topology, turn)
+
+    @property
+    def square_bits(self):
+        return self.topology.square_bits
+
+    @property
+    def difficulty_depths(self):
+        return self.rules.difficulty_depths
+
+    @property
+    def difficulty_iterations(self):
+        return self.rules.difficulty_iterations
+
+    @property
+    def difficulty_time_budgets(self):
+        return self.rules.difficulty_time_budgets
+
+    def is_game_over(self):
+        winner = self.board.search_outcome()
+        if winner is not None:
+            return True, PLAYERS[winner]
+        return False, None
+
+    def _square(self, position):
+        bit = self.topology.square_bits.get(position)
+        if bit is None:
+            raise Exception(f"Unknown position {position}.")
+        return bit
+
+    def place_piece(self, position, remove=None):
+        board = self.board
+        if not board.placing(board.turn):
+            raise Exception("Cannot place piece during movement phase.")
+        to = self._square(position)
+        if board.occupied & to:
+            raise Exception(f"Position {position} is already occupied.")
+        return self._play(0, to, remove) or "Piece placed successfully."
+
+    def move_piece(self, from_position, to_position, remove=None):
+        board = self.board
+        if board.placing(board.turn):
+            raise Exception("Cannot move piece during placement phase.")
+        frm, to = self._square(from_position), self._square(to_position)
+        if not board.pieces[board.turn] & frm:
+            raise Exception(f"Cannot move piece from {from_position} as it is not your piece.")
+        if board.occupied & to:
+            raise Exception(f"Position {to_position} is already occupied.")
+        if not board.flying(board.turn) and to_position not in self.rules.adjacency[from_position]:
+            raise Exception(f"Cannot move to {to_position} from {from_position}.")
+        return self._play(frm, to, remove) or "Piece moved successfully."
+
+    def _play(self, frm, to, remove):
+        """Apply a validated move, returning the win message if it ends the game"""
+        board = self.board
+        capture = 0
+        if self.rules.captures and board.closes_mill(board.turn, frm, to):
+            if remove is None:
+                raise Exception("You closed a mill: choose an opponent piece to remove.")
+            capture = self._square(remove)
+            if not board.removable(board.turn ^ 1) & capture:
+                raise Exception(f"Cannot remove {remove}.")
+        elif remove is not None:
+            raise Exception("Only closing a mill removes a piece.")
+
+        board.push((frm, to, capture))
+        self._record(self.topology.move_tuple((frm, to, capture)))
+        game_over, winner = self.is_game_over()
+        if game_over:
+            return f"Player {winner} wins!"
+        return None
+
+    def get_valid_moves(self, player):
+        """Get all valid moves for a player"""
+        return [self.topology.move_tuple(move) for move in self.board.moves(PLAYER_INDEX[player])]
+
+    def evaluate_position(self):
+        """Evaluate the current position for the AI"""
+        game_over, winner = self.is_game_over()
+        if game_over:
+            return WIN_SCORE if winner == self.ai_player else -WIN_SCORE
+        return heuristic(self.board, PLAYER_INDEX[self.ai_player])
+
+    def get_ai_move(self, depth=None, time_budget=None, stats=None, root_search=None, iterations=None):
+        """Get the best move for AI using iterative deepening alpha-beta search.
+
+        Same arguments and stats as ThreeMensMorris.get_ai_move, with source
+        random, search or mcts; there is no tablebase or book, and
+        `root_search` is ignored because its shared table only holds Three
+        Men's Morris moves. MCTS playouts run one at a time on these boards,
+        so they are cut short and scored by the heuristic.
+        """
+        start = time.perf_counter()
+        if depth is None:
+            depth = self.search_depth
+        if time_budget is None:
+            time_budget = self.time_budget
+
+        board = self.board
+        ai = PLAYER_INDEX[self.ai_player]
+        valid_moves = board.moves(ai)
+
+        if not valid_moves:
+            return None
+
+        # Add some randomness for easy mode
+        if self.difficulty == 'easy' and random.random() < 0.3:
+            _fill_stats(stats, 'random', start)
+            return self.topology.move_tuple(random.choice(valid_moves))
+
+        deadline = start + time_budget if time_budget else None
+        # A decided root has no children for MCTS to choose from; the search still returns a move
+        if self.engine == 'mcts' and board.search_outcome() is None:
+            search = MCTS(board, self.tree_cache, self.rules.name, playouts=4, max_plies=16, evaluate=heuristic)
+            best_move = search.run(iterations or self.difficulty_iterations.get(self.difficulty, 512), deadline)
+            _fill_mcts_stats(stats, start, search)
+            return self.topology.move_tuple(best_move)
+
+        table_hits = self.transposition_table.hits
+        search = Search(board, ai, self.transposition_table, deadline, evaluate=heuristic)
+        best_move, best_score, reached = search.iterate(valid_moves, depth)
+        _fill_stats(stats, 'search', start, search, reached, self.transposition_table.hits - table_hits)
+        return self.topology.move_tuple(best_move)
+
+    def to_dict(self, include_history=False):
+        return {'variant': self.rules.name, **super().to_dict(include_history)}
+
+
+def create_game(variant=RULES.name, book_variety=False, **options):
+    """New game of `variant`: a ThreeMensMorris for the default rules, else a MorrisGame.
+
+    `options` are the ThreeMensMorris constructor arguments; `book_variety`
+    only applies to Three Men's Morris, the one variant with an opening book.
+    """
+    if variant not in VARIANTS:
+        raise Exception(f"Unknown variant {variant}.")
+    if variant == RULES.name:
+        return ThreeMensMorris(book_variety=book_variety, **options)
+    return MorrisGame(VARIANTS[variant], **options)
+
+
+def game_from_dict(state):
+    """Game restored from a to_dict state of any variant"""
+    game = create_game(state.get('variant', RULES.name))
+    game.from_dict(state)
+    return game
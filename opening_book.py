@@ -0,0 +1,147 @@
+"""Opening book for the placement phase, keyed by symmetry-canonical position.
+
+Every reachable placement-phase position is searched offline at each
+difficulty's depth and all equally best replies are stored, so the engine
+plays the opening without searching. Run this module directly to
+regenerate ``opening_book.json``.
+"""
+import json
+import os
+from collections import deque
+
+from bitboard import BLUE, RED, BitBoard
+from rules import RULES
+from search import INF, Search
+from symmetry import INVERSE, canonicalize, transform_move
+from transposition import TranspositionTable
+
+OPENING_BOOK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'opening_book.json')
+BOOK_DEPTHS = tuple(sorted(set(RULES.difficulty_depths.values())))
+
+
+def placement_positions():
+    """Snapshots of the reachable, undecided placement-phase positions, one per canonical board"""
+    seen = set()
+    queue = deque()
+    for turn in (BLUE, RED):
+        start = BitBoard(turn).snapshot()
+        seen.add(start)
+        queue.append(start)
+
+    positions = {}
+    board = BitBoard()
+    while queue:
+        snapshot = queue.popleft()
+        board.restore(snapshot)
+        if board.movement or board.search_outcome() is not None:
+            continue
+        blue, red, _ = canonicalize(board.pieces[BLUE], board.pieces[RED])
+        positions.setdefault((blue, red, board.turn), snapshot)
+        for move in board.moves(board.turn):
+            board.push(move)
+            child = board.snapshot()
+            board.pop(move)
+            if child not in seen:
+                seen.add(child)
+                queue.append(child)
+    return positions
+
+
+class OpeningBook:
+    """Equally best replies per canonical placement position and search depth.
+
+    Scores are from the side to move's point of view, which is the AI
+    whenever the book is consulted. During placement the pieces on the board
+    determine the placement counters, so (blue, red, turn) is the whole key.
+    """
+
+    def __init__(self, entries, depths):
+        self.entries = entries
+        self.depths = tuple(depths)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def moves(self, board, depth):
+        """Book replies for the side to move in `board`'s orientation and generation order, or None.
+
+        The first reply is the one a full `depth` search would pick.
+        """
+        if board.movement or depth not in self.depths:
+            return None
+        blue, red, t = canonicalize(board.pieces[BLUE], board.pieces[RED])
+        replies = self.entries.get((blue, red, board.turn), {}).get(depth)
+        if replies is None:
+            return None
+        replies = {transform_move(move, INVERSE[t]) for move in replies}
+        return [move for move in board.moves(board.turn) if move in replies]
+
+    @classmethod
+    def generate(cls, depths=BOOK_DEPTHS):
+        """Search every placement position to each depth, keeping all moves with the best score"""
+        table = TranspositionTable()
+        board = BitBoard()
+        entries = {}
+        for key, snapshot in placement_positions().items():
+            board.restore(snapshot)
+            # Store replies in the canonical orientation of the key
+            t = canonicalize(board.pieces[BLUE], board.pieces[RED])[2]
+            search = Search(board, board.turn, table)
+            replies = entries[key] = {}
+            for depth in depths:
+                scores = {}
+                for move in board.moves(board.turn):
+                    board.push(move)
+                    scores[move] = search.minimax(depth - 1, False, -INF, INF)
+                    board.pop(move)
+                best = max(scores.values())
+                replies[depth] = tuple(transform_move(move, t) for move, score in scores.items() if score == best)
+        return cls(entries, depths)
+
+    def save(self, path=OPENING_BOOK_PATH):
+        positions = {
+            f'{blue},{red},{turn}': {str(depth): [list(move) for move in moves] for depth, moves in replies.items()}
+            for (blue, red, turn), replies in sorted(self.entries.items())
+        }
+        with open(path, 'w') as f:
+            json.dump({'depths': list(self.depths), 'positions': positions}, f, separators=(',', ':'))
+
+    @classmethod
+    def load(cls, path=OPENING_BOOK_PATH):
+        with open(path) as f:
+            data = json.load(f)
+        entries = {
+            tuple(int(part) for part in key.split(',')): {
+                int(depth): tuple(tuple(move) for move in moves) for depth, moves in replies.items()
+            }
+            for key, replies in data['positions'].items()
+        }
+        return cls(entries, data['depths'])
+
+
+_opening_book = None
+
+
+def get_opening_book():
+    """Process-wide opening book, loaded from disk or generated and saved on first use"""
+    global _opening_book
+    if _opening_book is None:
+        try:
+            _opening_book = OpeningBook.load()
+        except (OSError, KeyError, ValueError):
+            _opening_book = None
+        # A book built for other difficulty depths is regenerated
+        if _opening_book is None or _opening_book.depths != BOOK_DEPTHS:
+            _opening_book = OpeningBook.generate()
+            try:
+                _opening_book.save()
+            except OSError:
+                pass
+    return _opening_book
+
+
+if __name__ == "__main__":
+    book = OpeningBook.generate()
+    book.save()
+    print(f"Stored replies for {len(book)} placement positions at depths {book.depths}")
+    print(f"Saved to {OPENING_BOOK_PATH}")
@@ -0,0 +1,167 @@
+"""Root-splitting search over worker processes for the deepest difficulties.
+
+Root moves are searched in parallel. Each worker starts from the best score
+any worker has finished so far at that depth (a shared alpha bound) and
+probes a transposition table in shared memory, so workers reuse each
+other's subtrees. The best move is chosen exactly as Search.search_root
+does: highest score, ties to the earliest move in generation order.
+"""
+import multiprocessing
+import queue
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from bitboard import BitBoard
+from search import INF, WIN_SCORE, Search, SearchTimeout
+
+# Shared alpha value meaning no root move has finished yet
+NO_BOUND = -(1 << 62)
+_MASK64 = (1 << 64) - 1
+_VALID = 1 << 63
+_SCORE_OFFSET = 1 << 15
+
+
+class SharedTranspositionTable:
+    """Fixed-size, lock-free transposition table in shared memory.
+
+    Same get/store interface as TranspositionTable. A slot holds a data word
+    and the key XOR the data word, so an entry torn by a concurrent write
+    fails the key check and reads as a miss. New entries overwrite old ones.
+    """
+
+    def __init__(self, entries=1 << 18, array=None):
+        self.array = array if array is not None else multiprocessing.RawArray('Q', 2 * entries)
+        self.size = len(self.array) // 2
+        self.hits = 0
+        self.misses = 0
+
+    def _slot(self, key, depth):
+        return 2 * (((key ^ depth * 0x9E3779B97F4A7C15) & _MASK64) % self.size)
+
+    def get(self, key, depth):
+        slot = self._slot(key, depth)
+        data = self.array[slot + 1]
+        if not data or self.array[slot] ^ data != key or data >> 56 & 0x7F != depth:
+            self.misses += 1
+            return None
+        self.hits += 1
+        score = (data >> 40 & 0xFFFF) - _SCORE_OFFSET
+        bound = data >> 38 & 0x3
+        move = (data >> 9 & 0x1FF, data & 0x1FF) if data >> 37 & 1 else None
+        return score, bound, move
+
+    def store(self, key, depth, score, bound, best_move):
+        data = _VALID | depth << 56 | (score + _SCORE_OFFSET) << 40 | bound << 38
+        if best_move is not None:
+            data |= 1 << 37 | best_move[0] << 9 | best_move[1]
+        slot = self._slot(key, depth)
+        self.array[slot + 1] = data
+        self.array[slot] = key ^ data
+
+
+_table = None
+_alphas = None
+
+
+def _init_worker(table_array, alphas):
+    global _table, _alphas
+    _table = SharedTranspositionTable(array=table_array)
+    _alphas = alphas
+
+
+def _search_move(snapshot, ai, move, depth, slot, deadline):
+    board = BitBoard()
+    board.restore(snapshot)
+    search = Search(board, ai, _table, deadline)
+    hits = _table.hits
+    alpha = _alphas[slot]
+    # Scores are integers, so alpha - 1 still tells ties from worse moves
+    window = -INF if alpha == NO_BOUND else alpha - 1
+    try:
+        score = search.score_move(move, depth, window)
+    except SearchTimeout:
+        score = None
+    else:
+        with _alphas.get_lock():
+            if score > _alphas[slot]:
+                _alphas[slot] = score
+    return score, search.nodes, search.leaves, search.cutoffs, _table.hits - hits
+
+
+class RootSearchStats:
+    """Counters summed over every worker's share of one parallel search"""
+
+    def __init__(self):
+        self.nodes = 0
+        self.leaves = 0
+        self.cutoffs = 0
+        self.table_hits = 0
+
+
+class ParallelRootSearch:
+    """Iterative deepening whose root moves are split across `workers` processes.
+
+    Used for searches of at least `min_depth`. Up to `max_searches` games can
+    search at once, each with its own shared alpha slot; further callers wait.
+    """
+
+    def __init__(self, workers=None, min_depth=9, max_searches=8, table_entries=1 << 18):
+        self.workers = workers
+        self.min_depth = min_depth
+        self.table = SharedTranspositionTable(table_entries)
+        self.alphas = multiprocessing.Array('q', max_searches)
+        self._free_slots = queue.Queue()
+        for slot in range(max_searches):
+            self._free_slots.put(slot)
+        self._executor = None
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, initializer=_init_worker, initargs=(self.table.array, self.alphas)
+            )
+        return self._executor
+
+    def iterate(self, board, ai, moves, max_depth, deadline=None):
+        """(best_move, score, depth_reached, RootSearchStats), like Search.iterate"""
+        order = {move: i for i, move in enumerate(moves)}
+        snapshot = board.snapshot()
+        stats = RootSearchStats()
+        best_move, best_score, reached = moves[0], None, 0
+        executor = self._get_executor()
+        slot = self._free_slots.get()
+        try:
+            for depth in range(1, max_depth + 1):
+                self.alphas[slot] = NO_BOUND
+                # Previous best first, so its score becomes everyone's alpha early
+                ordered = sorted(moves, key=lambda move: move != best_move)
+                futures = [
+                    executor.submit(_search_move, snapshot, ai, move, depth, slot, deadline if depth > 1 else None)
+                    for move in ordered
+                ]
+                scores = {}
+                for move, future in zip(ordered, futures):
+                    score, nodes, leaves, cutoffs, hits = future.result()
+                    scores[move] = score
+                    stats.nodes += nodes
+                    stats.leaves += leaves
+                    stats.cutoffs += cutoffs
+                    stats.table_hits += hits
+                if None in scores.values():
+                    break
+
+                best_score = max(scores.values())
+                best_move = min((move for move in moves if scores[move] == best_score), key=order.get)
+                reached = depth
+                if abs(best_score) >= WIN_SCORE:
+                    break
+                if deadline is not None and time.perf_counter() > deadline:
+                    break
+        finally:
+            self._free_slots.put(slot)
+        return best_move, best_score, reached, stats
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,102 @@
+"""Speculative AI replies computed while the human is thinking"""
+import asyncio
+import time
+
+from bitboard import PLAYER_INDEX
+from rules import RULES
+from search import SCORES
+from three_mens_morris import ThreeMensMorris
+
+
+class Ponderer:
+    """Precomputes the AI's reply to each of the human's legal moves, per game.
+
+    After the AI moves, `start` searches the position after every human move
+    (most promising for the human first) on the AI pool, stopping once the
+    searches have used `budget` seconds, whenever real searches are queued on
+    the pool, or when `cancel` is called. `take` hands over a finished reply
+    for the position the human actually reached and cancels the rest. At
+    most `max_games` games keep pondered replies; the oldest are dropped.
+    """
+
+    def __init__(self, pool, budget=2.0, max_concurrent=1, max_games=10_000):
+        self.pool = pool
+        self.budget = budget
+        self.max_games = max_games
+        self.tasks = {}
+        self.replies = {}
+        self._slots = asyncio.Semaphore(max_concurrent)
+        self.hits = 0
+        self.misses = 0
+        self.searches = 0
+        self.seconds = 0.0
+
+    def start(self, game_id, game):
+        """Begin pondering the human's replies in `game`, replacing any earlier round"""
+        self.cancel(game_id)
+        # Replies are ordered with the Three Men's Morris score tables, so other variants are not pondered
+        if self.budget <= 0 or game.rules is not RULES or game.is_game_over()[0] or \
+           game.current_player != game.human_player:
+            return
+        while len(self.replies) >= self.max_games:
+            self.cancel(next(iter(self.replies)))
+        self.replies[game_id] = {}
+        self.tasks[game_id] = asyncio.create_task(self._ponder(game_id, game.to_dict()))
+
+    def cancel(self, game_id):
+        """Stop pondering `game_id` and drop its replies"""
+        task = self.tasks.pop(game_id, None)
+        if task is not None:
+            task.cancel()
+        self.replies.pop(game_id, None)
+
+    def take(self, game_id, game):
+        """(ai_move, stats) pondered for the current position of `game`, or None"""
+        pondering = game_id in self.replies
+        reply = self.replies.get(game_id, {}).get(game.board.snapshot())
+        self.cancel(game_id)
+        if reply is not None:
+            self.hits += 1
+        elif pondering:
+            self.misses += 1
+        return reply
+
+    async def _ponder(self, game_id, state):
+        game = ThreeMensMorris()
+        game.from_dict(state)
+        board = game.board
+        human = PLAYER_INDEX[game.human_player]
+        # Search the human's strongest-looking moves first
+        scores = SCORES[human]
+        moves = board.moves(human)
+        moves.sort(key=lambda move: -_score_after(board, move, scores))
+
+        spent = 0.0
+        for move in moves:
+            if spent >= self.budget or self.pool.pending:
+                break
+            board.push(move)
+            snapshot = board.snapshot()
+            child = None if game.is_game_over()[0] else game.to_dict()
+            board.pop(move)
+            if child is None:
+                continue
+            async with self._slots:
+                start = time.perf_counter()
+                try:
+                    reply = await self.pool.search(child, game_id)
+                except Exception:
+                    # Pondering is best effort; the real move is searched as usual
+                    break
+                elapsed = time.perf_counter() - start
+            spent += elapsed
+            self.searches += 1
+            self.seconds += elapsed
+            self.replies.get(game_id, {})[snapshot] = reply
+
+
+def _score_after(board, move, scores):
+    board.push(move)
+    score = scores[board.index]
+    board.pop(move)
+    return score
@@ -0,0 +1,126 @@
+"""Static rules and AI settings shared by every game.
+
+Nothing here is per-session state, so one immutable copy serves all games
+instead of each ThreeMensMorris instance carrying its own dicts. Other Morris
+variants are defined by the JSON files in variants/ and collected in VARIANTS.
+"""
+import json
+import os
+from types import MappingProxyType
+from typing import NamedTuple, Mapping, Sequence, Tuple
+
+
+class Rules(NamedTuple):
+    squares: Sequence[str]
+    adjacency: Mapping[str, Tuple[str, ...]]
+    winning_combinations: Tuple[Tuple[str, str, str], ...]
+    max_pieces: int
+    difficulty_depths: Mapping[str, int]
+    difficulty_time_budgets: Mapping[str, float]
+    difficulty_iterations: Mapping[str, int]
+    name: str = 'three_mens_morris'
+    # Closing a mill removes an opponent piece (instead of winning the game),
+    # and a player left with fewer than three pieces loses
+    captures: bool = False
+    # A player down to three pieces may move to any empty square
+    flying: bool = False
+    # A player who moves into a position where they cannot move next loses,
+    # even if the opponent cannot move either
+    blocked_mover_loses: bool = False
+
+
+RULES = Rules(
+    squares='abcdefghi',
+    adjacency=MappingProxyType({
+        'a': ('b', 'd', 'e'),
+        'b': ('a', 'c', 'e'),
+        'c': ('b', 'f', 'e'),
+        'd': ('a', 'e', 'g'),
+        'e': ('a', 'b', 'c', 'd', 'f', 'g', 'h', 'i'),
+        'f': ('c', 'e', 'i'),
+        'g': ('d', 'e', 'h'),
+        'h': ('e', 'g', 'i'),
+        'i': ('e', 'f', 'h')
+    }),
+    winning_combinations=(
+        ('a', 'b', 'c'), ('d', 'e', 'f'), ('g', 'h', 'i'),
+        ('a', 'd', 'g'), ('b', 'e', 'h'), ('c', 'f', 'i'),
+        ('a', 'e', 'i'), ('c', 'e', 'g')
+    ),
+    max_pieces=3,
+    blocked_mover_loses=True,
+    # Difficulty levels with different search depths
+    difficulty_depths=MappingProxyType({
+        'easy': 1,
+        'medium': 2,
+        'hard': 3,
+        'expert': 5,
+        'master': 9,  # Root moves split across processes when AI_ROOT_WORKERS is set
+        'perfect': 5  # Tablebase lookup; depth only used for unknown positions
+    }),
+    # Wall-clock budget in seconds for one AI move; deeper iterations are
+    # skipped once it runs out
+    difficulty_time_budgets=MappingProxyType({
+        'easy': 0.2,
+        'medium': 0.3,
+        'hard': 0.5,
+        'expert': 1.0,
+        'master': 2.0,
+        'perfect': 1.0
+    }),
+    # Tree leaves expanded per move by the MCTS engine, within the same time budgets
+    difficulty_iterations=MappingProxyType({
+        'easy': 32,
+        'medium': 128,
+        'hard': 512,
+        'expert': 2048,
+        'master': 8192,
+        'perfect': 8192
+    }),
+)
+
+
+VARIANTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'variants')
+
+
+def load_variant(path):
+    """Rules from a variant definition file; difficulty settings default to RULES' (without 'perfect')"""
+    with open(path) as f:
+        data = json.load(f)
+
+    squares = tuple(data['squares'])
+    adjacency = {sq: tuple(data['adjacency'][sq]) for sq in squares}
+    for sq, neighbours in adjacency.items():
+        for n in neighbours:
+            if sq not in adjacency.get(n, ()):
+                raise Exception(f"{path}: {sq} and {n} must list each other as adjacent.")
+    mills = tuple(tuple(mill) for mill in data['mills'])
+    for mill in mills:
+        if len(mill) != 3 or not set(mill) <= set(squares):
+            raise Exception(f"{path}: invalid mill {mill}.")
+
+    return Rules(
+        squares=squares,
+        adjacency=MappingProxyType(adjacency),
+        winning_combinations=mills,
+        max_pieces=data['pieces'],
+        # 'perfect' needs a tablebase, which only Three Men's Morris has
+        difficulty_depths=MappingProxyType(data.get('difficulty_depths', {
+            level: depth for level, depth in RULES.difficulty_depths.items() if level != 'perfect'})),
+        difficulty_time_budgets=MappingProxyType(
+            data.get('difficulty_time_budgets', RULES.difficulty_time_budgets)),
+        difficulty_iterations=MappingProxyType(data.get('difficulty_iterations', RULES.difficulty_iterations)),
+        name=data['name'],
+        captures=data.get('captures', False),
+        flying=data.get('flying', False),
+        blocked_mover_loses=data.get('blocked_mover_loses', False),
+    )
+
+
+# Every playable variant by name
+VARIANTS = {RULES.name: RULES}
+for _file in sorted(os.listdir(VARIANTS_DIR)):
+    if _file.endswith('.json'):
+        _rules = load_variant(os.path.join(VARIANTS_DIR, _file))
+        VARIANTS[_rules.name] = _rules
+VARIANTS = MappingProxyType(VARIANTS)
@@ -0,0 +1,258 @@
+"""Alpha-beta search over a BitBoard with iterative deepening and move ordering"""
+import time
+
+from bitboard import AI_SIDE_KEYS, BLUE, CENTER, FULL_BOARD, POPCOUNT, POSITION_COUNT, RED, TERNARY, TURN_KEYS, \
+    WIN_MASKS
+from transposition import EXACT, LOWER, UPPER
+
+WIN_SCORE = 1000
+INF = float('inf')
+
+# Check the clock once per this many nodes
+CLOCK_INTERVAL = 256
+
+
+class SearchTimeout(Exception):
+    """Raised inside the search when the time budget runs out"""
+
+
+def heuristic(board, ai):
+    """Line and center score of a non-terminal position for the AI"""
+    ai_bits = board.pieces[ai]
+    human_bits = board.pieces[ai ^ 1]
+    score = 0
+
+    # Check for potential winning lines
+    for mask in WIN_MASKS:
+        ai_count = POPCOUNT[ai_bits & mask]
+        human_count = POPCOUNT[human_bits & mask]
+
+        if human_count == 0:  # AI can potentially win this line
+            if ai_count == 2:
+                score += 50  # One move away from winning
+            elif ai_count == 1:
+                score += 10  # Two moves away from winning
+
+        if ai_count == 0:  # Human can potentially win this line
+            if human_count == 2:
+                score -= 50  # Block human from winning
+            elif human_count == 1:
+                score -= 10  # Human has potential
+
+    # Prefer center position
+    if ai_bits & CENTER:
+        score += 5
+    elif human_bits & CENTER:
+        score -= 5
+
+    return score
+
+
+class _Pieces:
+    __slots__ = ('pieces',)
+
+
+def _score_tables():
+    # heuristic() depends only on the two piece sets, so score every position
+    # once by its base-3 index; the score is antisymmetric in the two sides
+    blue_scores = [0] * POSITION_COUNT
+    board = _Pieces()
+    for blue in range(FULL_BOARD + 1):
+        free = FULL_BOARD & ~blue
+        red = free
+        while True:
+            board.pieces = (blue, red)
+            blue_scores[TERNARY[blue] + 2 * TERNARY[red]] = heuristic(board, BLUE)
+            if red == 0:
+                break
+            red = (red - 1) & free
+    scores = [None, None]
+    scores[BLUE] = tuple(blue_scores)
+    scores[RED] = tuple(-score for score in blue_scores)
+    return tuple(scores)
+
+
+# SCORES[ai][board.index] == heuristic(board, ai); BitBoard keeps `index`
+# up to date on every push and pop, so a leaf costs one lookup
+SCORES = _score_tables()
+
+
+class Search:
+    """State for one AI decision: board, deadline, killer moves and history scores.
+
+    Any board with the BitBoard search interface (moves, push, pop,
+    search_outcome, hash, snapshot, restore) can be searched; boards without
+    a base-3 `index` pass an `evaluate(board, ai)` leaf scorer.
+    """
+
+    def __init__(self, board, ai, transposition_table, deadline=None, evaluate=None):
+        self.board = board
+        self.ai = ai
+        self.table = transposition_table
+        self.deadline = deadline
+        self.side_key = AI_SIDE_KEYS[ai]
+        self.scores = SCORES[ai]
+        self.evaluate = evaluate
+        # Counters are plain attribute increments off the hot path (leaves and
+        # cutoffs only), so they are always on and cost next to nothing
+        self.nodes = 0
+        self.leaves = 0
+        self.cutoffs = 0
+        self.killers = {}
+        self.history = {}
+        self._stop_at = None
+
+    def minimax(self, depth, maximizing_player, alpha, beta, ply=1):
+        """Minimax algorithm with alpha-beta pruning and a transposition table"""
+        self.nodes += 1
+        if self._stop_at is not None and self.nodes % CLOCK_INTERVAL == 0 and \
+           time.perf_counter() > self._stop_at:
+            raise SearchTimeout()
+
+        board = self.board
+        outcome = board.search_outcome()
+
+        if outcome is not None:
+            self.leaves += 1
+            return WIN_SCORE if outcome == self.ai else -WIN_SCORE
+        if depth == 0:
+            self.leaves += 1
+            if self.evaluate is not None:
+                return self.evaluate(board, self.ai)
+            return self.scores[board.index]
+
+        key = board.hash ^ TURN_KEYS[board.turn] ^ self.side_key
+        entry = self.table.get(key, depth)
+        hint = None
+
+        if entry is not None:
+            score, bound, hint = entry
+            if bound == EXACT or (bound == LOWER and score >= beta) or (bound == UPPER and score <= alpha):
+                return score
+
+        valid_moves = board.moves(board.turn)
+        self._order(valid_moves, hint, ply)
+        alpha_orig, beta_orig = alpha, beta
+        best_move = None
+
+        if maximizing_player:
+            best_eval = -INF
+            for move in valid_moves:
+                board.push(move)
+                eval_score = self.minimax(depth - 1, False, alpha, beta, ply + 1)
+                board.pop(move)
+                if eval_score > best_eval:
+                    best_eval, best_move = eval_score, move
+                alpha = max(alpha, eval_score)
+                if beta <= alpha:
+                    self._record_cutoff(move, depth, ply)
+                    break  # Alpha-beta pruning
+        else:
+            best_eval = INF
+            for move in valid_moves:
+                board.push(move)
+                eval_score = self.minimax(depth - 1, True, alpha, beta, ply + 1)
+                board.pop(move)
+                if eval_score < best_eval:
+                    best_eval, best_move = eval_score, move
+                beta = min(beta, eval_score)
+                if beta <= alpha:
+                    self._record_cutoff(move, depth, ply)
+                    break  # Alpha-beta pruning
+
+        if best_eval <= alpha_orig:
+            bound = UPPER
+        elif best_eval >= beta_orig:
+            bound = LOWER
+        else:
+            bound = EXACT
+        self.table.store(key, depth, best_eval, bound, best_move)
+        return best_eval
+
+    def _order(self, moves, hint, ply):
+        """Sort moves in place: table move, then killers, then history score"""
+        killers = self.killers.get(ply, ())
+        history = self.history
+        # Stable sort, so untouched moves keep generation order
+        moves.sort(key=lambda move: (move == hint, move in killers, history.get(move, 0)), reverse=True)
+
+    def _record_cutoff(self, move, depth, ply):
+        self.cutoffs += 1
+        killers = self.killers.setdefault(ply, [])
+        if move not in killers:
+            killers.insert(0, move)
+            del killers[2:]
+        self.history[move] = self.history.get(move, 0) + depth * depth
+
+    def principal_variation(self, move, depth):
+        """Expected line starting with `move`, following best moves stored in the table"""
+        board = self.board
+        line = []
+        while move is not None and depth > 0 and move in board.moves(board.turn):
+            line.append(move)
+            board.push(move)
+            depth -= 1
+            if depth == 0 or board.search_outcome() is not None:
+                break
+            entry = self.table.get(board.hash ^ TURN_KEYS[board.turn] ^ self.side_key, depth)
+            move = entry[2] if entry is not None else None
+        for played in reversed(line):
+            board.pop(played)
+        return line
+
+    def score_move(self, move, depth, alpha=-INF):
+        """Score of root `move` searched to `depth`, exact when above `alpha`.
+
+        Raises SearchTimeout once the deadline passes.
+        """
+        self._stop_at = self.deadline
+        self.board.push(move)
+        try:
+            return self.minimax(depth - 1, False, alpha, INF)
+        finally:
+            self.board.pop(move)
+
+    def search_root(self, moves, depth, pv_move=None):
+        """Best (move, score) at a fixed depth, ties going to the earliest move in `moves`"""
+        order = {move: i for i, move in enumerate(moves)}
+        ordered = sorted(moves, key=lambda move: move != pv_move)
+        board = self.board
+        best_move, best_score = None, -INF
+
+        for move in ordered:
+            # Scores are integers, so this window still tells ties from worse moves
+            alpha = best_score - 1 if best_move is not None else -INF
+            board.push(move)
+            score = self.minimax(depth - 1, False, alpha, INF)
+            board.pop(move)
+
+            if score > best_score or (score == best_score and order[move] < order[best_move]):
+                best_score = score
+                best_move = move
+
+        return best_move, best_score
+
+    def iterate(self, moves, max_depth):
+        """Iterative deepening up to max_depth within the deadline.
+
+        Returns (best_move, score, depth_reached) from the deepest completed
+        iteration. Depth 1 always completes; deeper iterations stop when the
+        deadline passes or a forced win or loss has been proven.
+        """
+        snapshot = self.board.snapshot()
+        best_move, best_score, reached = moves[0], None, 0
+
+        for depth in range(1, max_depth + 1):
+            try:
+                best_move, best_score = self.search_root(moves, depth, best_move)
+            except SearchTimeout:
+                self.board.restore(snapshot)
+                break
+            reached = depth
+            self._stop_at = self.deadline
+            if abs(best_score) >= WIN_SCORE:
+                break
+            if self.deadline is not None and time.perf_counter() > self.deadline:
+                break
+
+        return best_move, best_score, reached
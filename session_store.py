@@ -0,0 +1,155 @@
+"""Game session stores: an in-process LRU/TTL store and a shared SQLite store"""
+import json
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+from morris import game_from_dict
+
+
+class SessionStore(ABC):
+    """Maps game ids to ThreeMensMorris (or MorrisGame) games.
+
+    Callers must `save` a game after changing it; stores that serialize
+    sessions only see changes that were saved. Stores given an
+    `on_evict(game_id, game)` callback call it for every session they drop
+    on their own (expired or beyond capacity), but not for `delete`.
+    """
+
+    @abstractmethod
+    def get(self, game_id):
+        """The game stored under `game_id`, or None"""
+
+    @abstractmethod
+    def save(self, game_id, game):
+        """Store `game` under `game_id`"""
+
+    @abstractmethod
+    def delete(self, game_id):
+        """Remove a session, returning whether it existed"""
+
+    @abstractmethod
+    def __len__(self):
+        """Number of live sessions"""
+
+    def __contains__(self, game_id):
+        return self.get(game_id) is not None
+
+
+class MemorySessionStore(SessionStore):
+    """Sessions held in this process, evicted when idle for `ttl` seconds or beyond `max_sessions`"""
+
+    def __init__(self, max_sessions=10_000, ttl=3600, on_evict=None):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.on_evict = on_evict
+        self.sessions = OrderedDict()  # game_id -> (game, last_access)
+
+    def _evict(self, now):
+        while self.sessions:
+            game_id, (game, last_access) = next(iter(self.sessions.items()))
+            if len(self.sessions) <= self.max_sessions and now - last_access <= self.ttl:
+                break
+            del self.sessions[game_id]
+            if self.on_evict is not None:
+                self.on_evict(game_id, game)
+
+    def get(self, game_id):
+        now = time.monotonic()
+        self._evict(now)
+        entry = self.sessions.get(game_id)
+        if entry is None:
+            return None
+        self.sessions[game_id] = (entry[0], now)
+        self.sessions.move_to_end(game_id)
+        return entry[0]
+
+    def save(self, game_id, game):
+        now = time.monotonic()
+        self.sessions[game_id] = (game, now)
+        self.sessions.move_to_end(game_id)
+        self._evict(now)
+
+    def delete(self, game_id):
+        return self.sessions.pop(game_id, None) is not None
+
+    def __len__(self):
+        self._evict(time.monotonic())
+        return len(self.sessions)
+
+
+class SQLiteSessionStore(SessionStore):
+    """Sessions stored as to_dict JSON in a WAL-mode SQLite file shared by all worker processes"""
+
+    # Delete expired rows once per this many saves
+    CLEANUP_INTERVAL = 100
+
+    def __init__(self, path='sessions.db', ttl=3600, on_evict=None):
+        self.ttl = ttl
+        self.on_evict = on_evict
+        self.connection = sqlite3.connect(path, timeout=10, isolation_level=None, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "game_id TEXT PRIMARY KEY, state TEXT NOT NULL, updated REAL NOT NULL)"
+        )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS sessions_updated ON sessions (updated)")
+        self._saves = 0
+
+    def get(self, game_id):
+        row = self.connection.execute(
+            "SELECT state FROM sessions WHERE game_id = ? AND updated >= ?",
+            (game_id, time.time() - self.ttl)
+        ).fetchone()
+        if row is None:
+            return None
+        return game_from_dict(json.loads(row[0]))
+
+    def save(self, game_id, game):
+        self.connection.execute(
+            "INSERT OR REPLACE INTO sessions (game_id, state, updated) VALUES (?, ?, ?)",
+            (game_id, json.dumps(game.to_dict(include_history=True), separators=(',', ':')), time.time())
+        )
+        self._saves += 1
+        if self._saves % self.CLEANUP_INTERVAL == 0:
+            self._cleanup()
+
+    def _cleanup(self):
+        """Delete expired rows, passing them to on_evict first"""
+        cutoff = time.time() - self.ttl
+        if self.on_evict is None:
+            self.connection.execute("DELETE FROM sessions WHERE updated < ?", (cutoff,))
+            return
+        # The write lock is held from the select to the delete, so a row
+        # expired by several worker processes is only evicted by one of them
+        self.connection.execute("BEGIN IMMEDIATE")
+        try:
+            rows = self.connection.execute(
+                "SELECT game_id, state FROM sessions WHERE updated < ?", (cutoff,)).fetchall()
+            self.connection.execute("DELETE FROM sessions WHERE updated < ?", (cutoff,))
+            self.connection.execute("COMMIT")
+        except BaseException:
+            self.connection.execute("ROLLBACK")
+            raise
+        for game_id, state in rows:
+            self.on_evict(game_id, game_from_dict(json.loads(state)))
+
+    def delete(self, game_id):
+        cursor = self.connection.execute("DELETE FROM sessions WHERE game_id = ?", (game_id,))
+        return cursor.rowcount > 0
+
+    def __len__(self):
+        return self.connection.execute(
+            "SELECT COUNT(*) FROM sessions WHERE updated >= ?", (time.time() - self.ttl,)
+        ).fetchone()[0]
+
+
+def create_session_store(backend='memory', **options):
+    """Build the store named by `backend` ('memory' or 'sqlite')"""
+    if backend == 'memory':
+        return MemorySessionStore(**options)
+    if backend == 'sqlite':
+        return SQLiteSessionStore(**options)
+    raise ValueError(f"Unknown session store backend: {backend}")
@@ -1,7 +1,18 @@
+// Squares in the order of the compact board string
+const SQUARES = ['a', 'b', 'c', 'd', 'e', 'f', 'g', 'h', 'i'];
+const OWNERS = { b: 'blue', r: 'red', '.': null };
+
 class GameUI {
     constructor() {
         this.gameId = null;
-        this.gameState = null;
+        // Board and turn from the server's compact states; `ply` is how many
+        // moves the board reflects, so responses only need the squares changed since
+        this.board = {};
+        this.ply = 0;
+        this.turn = null;
+        this.phase = null;
+        this.legal = [];
+        this.socket = null;
         this.selectedPiece = null;
         this.isMovementPhase = false;
         this.isGameOver = false;
@@ -40,7 +51,7 @@ class GameUI {
         else if (whoFirst === 'ai') humanFirst = false;
         
         try {
-            const response = await fetch('/api/new-game', {
+            const response = await fetch('/api/new-game?format=compact', {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json',
@@ -56,24 +67,50 @@ class GameUI {
             }
             
             const data = await response.json();
-            this.gameId = data.game_id;
+            this.gameId = data.id;
             this.updateGameState(data);
+            this.connect(data.id);
             
         } catch (error) {
             this.showMessage('Error creating new game: ' + error.message, 'error');
         }
     }
     
+    connect(gameId) {
+        // One WebSocket per game; moves fall back to HTTP while it is not open
+        if (this.socket) this.socket.close();
+        
+        const protocol = window.location.protocol === 'https:' ? 'wss' : 'ws';
+        this.socket = new WebSocket(`${protocol}://${window.location.host}/ws/game/${gameId}?format=compact`);
+        this.socket.addEventListener('message', (event) => this.handleSocketMessage(JSON.parse(event.data)));
+    }
+    
+    handleSocketMessage(data) {
+        if (data.type === 'state' || data.type === 'move') {
+            // Moves carry only the squares that changed
+            this.updateGameState(data);
+        } else if (data.type === 'thinking') {
+            this.showMessage('AI is thinking...', 'info');
+        } else if (data.type === 'error') {
+            this.showMessage('Error: ' + data.detail, 'error');
+        }
+    }
+    
     async makeMove(position, fromPosition = null, toPosition = null) {
         if (!this.gameId || this.isGameOver) return;
         
+        if (this.socket && this.socket.readyState === WebSocket.OPEN) {
+            this.socket.send(JSON.stringify({ move: position || fromPosition + toPosition }));
+            return;
+        }
+        
         const moveData = {};
         if (position) moveData.position = position;
         if (fromPosition) moveData.from_position = fromPosition;
         if (toPosition) moveData.to_position = toPosition;
         
         try {
-            const response = await fetch(`/api/make-move/${this.gameId}`, {
+            const response = await fetch(`/api/make-move/${this.gameId}?format=compact&since=${this.ply}`, {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json',
@@ -98,22 +135,22 @@ class GameUI {
         if (!this.gameId || this.isGameOver) return;
         
         const position = event.target.getAttribute('data-pos');
-        const currentPiece = this.gameState?.positions[position];
+        const currentPiece = this.board[position];
         
-        if (this.gameState.phase === 'placement') {
+        if (this.phase === 'placement') {
             // Placement phase - place piece on empty position
-            if (!currentPiece && this.gameState.current_player === 'blue') {
+            if (this.legal.includes(position)) {
                 this.makeMove(position);
             }
         } else {
             // Movement phase
-            if (this.gameState.current_player === 'blue') {
+            if (this.turn === 'blue') {
                 if (this.selectedPiece) {
                     // Second click - try to move to this position
                     if (position === this.selectedPiece) {
                         // Clicking same piece - deselect
                         this.clearSelection();
-                    } else if (!currentPiece && this.isValidMove(this.selectedPiece, position)) {
+                    } else if (this.isValidMove(this.selectedPiece, position)) {
                         // Valid move - make the move
                         this.makeMove(null, this.selectedPiece, position);
                         this.clearSelection();
@@ -160,54 +197,51 @@ class GameUI {
     }
     
     isValidMove(fromPosition, toPosition) {
-        const adjacentPositions = this.getAdjacentPositions(fromPosition);
-        return adjacentPositions.includes(toPosition);
+        // Legal moves come from the server, e.g. "ae" for a move from a to e
+        return this.legal.includes(fromPosition + toPosition);
     }
     
     getValidDestinations(fromPosition) {
-        const adjacentPositions = this.getAdjacentPositions(fromPosition);
-        return adjacentPositions.filter(pos => !this.gameState.positions[pos]);
-    }
-    
-    getAdjacentPositions(position) {
-        const adjacency = {
-            'a': ['b', 'd', 'e'],
-            'b': ['a', 'c', 'e'],
-            'c': ['b', 'f', 'e'],
-            'd': ['a', 'e', 'g'],
-            'e': ['a', 'b', 'c', 'd', 'f', 'g', 'h', 'i'],
-            'f': ['c', 'e', 'i'],
-            'g': ['d', 'e', 'h'],
-            'h': ['e', 'g', 'i'],
-            'i': ['e', 'f', 'h']
-        };
-        
-        return adjacency[position] || [];
+        return this.legal
+            .filter(move => move.length === 2 && move[0] === fromPosition)
+            .map(move => move[1]);
     }
     
     updateGameState(data) {
-        this.gameState = data.state;
-        this.isGameOver = data.game_over;
+        // Apply a compact state: the whole board, or the squares changed since our ply
+        if (data.board !== undefined) {
+            this.board = {};
+            SQUARES.forEach((sq, i) => { this.board[sq] = OWNERS[data.board[i]]; });
+        } else {
+            for (const [sq, owner] of Object.entries(data.changes)) {
+                this.board[sq] = OWNERS[owner];
+            }
+        }
+        this.ply = data.ply;
+        this.turn = OWNERS[data.turn];
+        this.phase = data.phase === 'p' ? 'placement' : 'movement';
+        this.legal = data.legal;
+        this.isGameOver = data.over;
         
         // Update UI elements
-        this.currentPhase.textContent = data.state.phase.charAt(0).toUpperCase() + data.state.phase.slice(1);
-        this.currentTurn.textContent = data.state.current_player === 'blue' ? 'You (Blue)' : 'AI (Red)';
-        this.bluePieces.textContent = `${data.state.pieces_placed.blue}/3`;
-        this.redPieces.textContent = `${data.state.pieces_placed.red}/3`;
+        this.currentPhase.textContent = this.phase.charAt(0).toUpperCase() + this.phase.slice(1);
+        this.currentTurn.textContent = this.turn === 'blue' ? 'You (Blue)' : 'AI (Red)';
+        this.bluePieces.textContent = `${data.placed[0]}/3`;
+        this.redPieces.textContent = `${data.placed[1]}/3`;
         
         // Update board positions
         this.updateBoard();
         
         // Simplified message handling
-        if (data.game_over) {
-            if (data.winner === 'blue') {
+        if (data.over) {
+            if (OWNERS[data.winner] === 'blue') {
                 this.showMessage('You Win! 🎉', 'success');
             } else {
                 this.showMessage('AI Wins! 🤖', 'error');
             }
         } else {
-            if (data.state.current_player === 'blue') {
-                if (data.state.phase === 'placement') {
+            if (this.turn === 'blue') {
+                if (this.phase === 'placement') {
                     this.showMessage('Your turn - Place a piece', 'info');
                 } else {
                     this.showMessage('Your turn - Move a piece', 'info');
@@ -224,7 +258,7 @@ class GameUI {
     updateBoard() {
         this.positions.forEach(posElement => {
             const pos = posElement.getAttribute('data-pos');
-            const piece = this.gameState.positions[pos];
+            const piece = this.board[pos];
             
             // Reset classes
             posElement.setAttribute('class', 'position');
@@ -0,0 +1,119 @@
+"""Dihedral symmetry of the 3x3 board and a canonical-position move cache.
+
+The adjacency graph and the winning lines are invariant under the 8
+rotations and reflections of the square, so positions that differ only by
+one of them have the same value and corresponding best moves.
+"""
+from collections import OrderedDict
+
+from bitboard import ADJACENCY, BLUE, FULL_BOARD, RED, SQUARES, WINNING_COMBINATIONS
+
+# Each transform maps (row, col) of the 3x3 grid to a new (row, col)
+_GRID_TRANSFORMS = (
+    lambda r, c: (r, c),
+    lambda r, c: (c, 2 - r),
+    lambda r, c: (2 - r, 2 - c),
+    lambda r, c: (2 - c, r),
+    lambda r, c: (r, 2 - c),
+    lambda r, c: (2 - r, c),
+    lambda r, c: (c, r),
+    lambda r, c: (2 - c, 2 - r),
+)
+
+# PERMUTATIONS[t][i] is the square index that square i is sent to by transform t
+PERMUTATIONS = tuple(
+    tuple(3 * row + col for row, col in (f(*divmod(i, 3)) for i in range(len(SQUARES))))
+    for f in _GRID_TRANSFORMS
+)
+INVERSE = tuple(
+    next(u for u, other in enumerate(PERMUTATIONS) if all(other[p[i]] == i for i in range(len(SQUARES))))
+    for p in PERMUTATIONS
+)
+
+
+def _permute_bits(permutation, bits):
+    out = 0
+    for i, target in enumerate(permutation):
+        if bits >> i & 1:
+            out |= 1 << target
+    return out
+
+
+# TRANSFORM_BITS[t][bits] is the piece set `bits` after transform t
+TRANSFORM_BITS = tuple(
+    tuple(_permute_bits(p, bits) for bits in range(FULL_BOARD + 1)) for p in PERMUTATIONS
+)
+
+
+def _check_invariance():
+    index = {sq: i for i, sq in enumerate(SQUARES)}
+    lines = {frozenset(index[sq] for sq in combo) for combo in WINNING_COMBINATIONS}
+    edges = {frozenset((index[a], index[b])) for a in ADJACENCY for b in ADJACENCY[a]}
+    for p in PERMUTATIONS:
+        assert {frozenset(p[i] for i in line) for line in lines} == lines
+        assert {frozenset(p[i] for i in edge) for edge in edges} == edges
+
+
+_check_invariance()
+
+
+def canonicalize(blue, red):
+    """(canonical_blue, canonical_red, transform) with the smallest packed board"""
+    best = None
+    for t, table in enumerate(TRANSFORM_BITS):
+        candidate = (table[red] << 9 | table[blue], t)
+        if best is None or candidate < best:
+            best = candidate
+    packed, t = best
+    return packed & FULL_BOARD, packed >> 9, t
+
+
+def transform_move(move, t):
+    """Map an engine (from_mask, to_mask) move through transform t"""
+    table = TRANSFORM_BITS[t]
+    return (table[move[0]], table[move[1]])
+
+
+class PositionCache:
+    """Process-wide LRU of best move and score keyed by canonical position"""
+
+    def __init__(self, max_entries=100_000):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    @staticmethod
+    def _key(board, ai, depth):
+        blue, red, t = canonicalize(board.pieces[BLUE], board.pieces[RED])
+        return (blue, red, board.turn, board.placed[BLUE], board.placed[RED], ai, depth), t
+
+    def get(self, board, ai, depth):
+        """Cached (move, score) for `board` in its own orientation, or None"""
+        key, t = self._key(board, ai, depth)
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        move, score = entry
+        return transform_move(move, INVERSE[t]), score
+
+    def put(self, board, ai, depth, move, score):
+        key, t = self._key(board, ai, depth)
+        self.entries[key] = (transform_move(move, t), score)
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+shared_cache = PositionCache()
@@ -0,0 +1,175 @@
+"""Perfect-play tablebase for every reachable Three Men's Morris position.
+
+Positions are solved once by retrograde analysis and stored as one byte per
+(board, side to move) in base-3 order, so a lookup is a single index.
+Run this module directly to regenerate ``tablebase.bin``.
+"""
+import os
+from collections import deque
+
+from bitboard import BLUE, POSITION_COUNT, RED, TERNARY, BitBoard
+
+TABLEBASE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tablebase.bin')
+MAGIC = b'TMMTB1'
+
+DRAW, WIN, LOSS = 'draw', 'win', 'loss'
+TABLE_SIZE = POSITION_COUNT * 2
+
+
+def state_index(blue, red, turn):
+    """Dense index of a position in the table"""
+    return (TERNARY[blue] + 2 * TERNARY[red]) * 2 + turn
+
+
+def _encode(result, dtm):
+    # 0 marks unreachable positions, 1 a draw, then wins/losses by distance to mate
+    if result == DRAW:
+        return 1
+    return 2 + 2 * dtm + (result == LOSS)
+
+
+def _decode(entry):
+    if entry == 0:
+        return None
+    if entry == 1:
+        return DRAW, None
+    return (LOSS if entry & 1 else WIN), (entry - 2) // 2
+
+
+class Tablebase:
+    """Win/loss/draw and distance to mate, from the side to move's point of view"""
+
+    def __init__(self, data):
+        if len(data) != TABLE_SIZE:
+            raise ValueError("Tablebase has the wrong size.")
+        self.data = bytes(data)
+
+    def probe(self, board):
+        """(result, dtm) for the side to move, or None if the position is unreachable"""
+        return _decode(self.data[board.index * 2 + board.turn])
+
+    def best_move(self, board, tiebreak=None):
+        """Best engine move for the side to move, preferring the fastest win or slowest loss.
+
+        Among equally good moves the one with the highest ``tiebreak(board)``
+        score after the move is chosen, and the first in generation order
+        otherwise.
+        """
+        best_move, best_key = None, None
+        for move in board.moves(board.turn):
+            board.push(move)
+            entry = self.probe(board)
+            extra = tiebreak(board) if tiebreak else 0
+            board.pop(move)
+            if entry is None:
+                continue
+            result, dtm = entry
+            # Rank children by the mover's outcome: opponent losses first, then draws
+            if result == LOSS:
+                key = (2, -dtm, extra)
+            elif result == DRAW:
+                key = (1, 0, extra)
+            else:
+                key = (0, dtm, extra)
+            if best_key is None or key > best_key:
+                best_move, best_key = move, key
+        return best_move
+
+    @classmethod
+    def solve(cls):
+        """Enumerate every reachable position and label it by retrograde analysis"""
+        states = {}
+        parents = {}
+        queue = deque()
+        resolved = deque()
+
+        for turn in (BLUE, RED):
+            start = BitBoard(turn)
+            states[start.snapshot()] = None
+            queue.append(start.snapshot())
+
+        # Forward pass: discover positions, successor counts and predecessors
+        remaining = {}
+        board = BitBoard()
+        while queue:
+            snapshot = queue.popleft()
+            board.restore(snapshot)
+            winner = board.search_outcome()
+            if winner is not None:
+                states[snapshot] = (WIN if winner == board.turn else LOSS, 0)
+                resolved.append(snapshot)
+                continue
+            moves = board.moves(board.turn)
+            remaining[snapshot] = len(moves)
+            for move in moves:
+                board.push(move)
+                child = board.snapshot()
+                board.pop(move)
+                parents.setdefault(child, []).append(snapshot)
+                if child not in states:
+                    states[child] = None
+                    queue.append(child)
+
+        # Backward pass in order of increasing distance to mate
+        while resolved:
+            child = resolved.popleft()
+            result, dtm = states[child]
+            for parent in parents.get(child, ()):
+                if states[parent] is not None:
+                    continue
+                if result == LOSS:
+                    states[parent] = (WIN, dtm + 1)
+                    resolved.append(parent)
+                else:
+                    remaining[parent] -= 1
+                    if remaining[parent] == 0:
+                        states[parent] = (LOSS, dtm + 1)
+                        resolved.append(parent)
+
+        data = bytearray(TABLE_SIZE)
+        for (blue, red, turn, _, _), entry in states.items():
+            result, dtm = entry if entry is not None else (DRAW, None)
+            data[state_index(blue, red, turn)] = _encode(result, dtm)
+        return cls(data)
+
+    def save(self, path=TABLEBASE_PATH):
+        with open(path, 'wb') as f:
+            f.write(MAGIC + self.data)
+
+    @classmethod
+    def load(cls, path=TABLEBASE_PATH):
+        with open(path, 'rb') as f:
+            raw = f.read()
+        if not raw.startswith(MAGIC):
+            raise ValueError(f"{path} is not a tablebase file.")
+        return cls(raw[len(MAGIC):])
+
+
+_tablebase = None
+
+
+def get_tablebase():
+    """Process-wide tablebase, loaded from disk or solved and saved on first use"""
+    global _tablebase
+    if _tablebase is None:
+        try:
+            _tablebase = Tablebase.load()
+        except (OSError, ValueError):
+            _tablebase = Tablebase.solve()
+            try:
+                _tablebase.save()
+            except OSError:
+                pass
+    return _tablebase
+
+
+if __name__ == "__main__":
+    table = Tablebase.solve()
+    table.save()
+    counts = {}
+    for entry in table.data:
+        decoded = _decode(entry)
+        if decoded is not None:
+            counts[decoded[0]] = counts.get(decoded[0], 0) + 1
+    print(f"Solved {sum(counts.values())} positions: {counts}")
+    print(f"Saved to {TABLEBASE_PATH}")
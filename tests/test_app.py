@@ -0,0 +1,105 @@
+import os
+import tempfile
+import unittest
+
+# Searches inline and no game log, set before the app reads them at import
+os.environ.setdefault('AI_POOL_WORKERS', '0')
+os.environ.setdefault('GAME_LOG_PATH', '')
+
+from fastapi.testclient import TestClient
+
+import app as app_module
+from game_log import GameLog, read_records
+from morris import create_game
+
+
+class AppTest(unittest.TestCase):
+    def setUp(self):
+        self.client = TestClient(app_module.app)
+
+    def new_game(self, **options):
+        payload = {'difficulty': 'easy', 'human_first': True, **options}
+        response = self.client.post('/api/new-game', json=payload)
+        self.assertEqual(response.status_code, 200, response.text)
+        return response.json()['game_id']
+
+
+class WebSocketTest(AppTest):
+    def test_non_json_frame_keeps_the_connection_open(self):
+        game_id = self.new_game()
+        with self.client.websocket_connect(f'/ws/game/{game_id}') as ws:
+            self.assertEqual(ws.receive_json()['type'], 'state')
+            ws.send_text('not json')
+            self.assertEqual(ws.receive_json(), {'type': 'error', 'detail': 'Messages must be JSON'})
+            ws.send_json({'move': 'a'})
+            reply = ws.receive_json()
+            self.assertEqual(reply['type'], 'move')
+            self.assertEqual(reply['by'], 'human')
+
+    def test_unknown_square(self):
+        game_id = self.new_game()
+        with self.client.websocket_connect(f'/ws/game/{game_id}') as ws:
+            ws.receive_json()
+            ws.send_json({'move': 'q'})
+            self.assertEqual(ws.receive_json(), {'type': 'error', 'detail': 'Invalid position q'})
+
+
+class MakeMoveTest(AppTest):
+    def test_unknown_square(self):
+        for variant, square in (('three_mens_morris', 'q'), ('three_mens_morris', 'ab'),
+                                ('nine_mens_morris', 'z9')):
+            with self.subTest(variant=variant, square=square):
+                game_id = self.new_game(variant=variant)
+                response = self.client.post(f'/api/make-move/{game_id}', json={'position': square})
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json()['detail'], f'Invalid position {square}')
+
+
+class NewGameTest(AppTest):
+    def test_perfect_is_only_offered_where_there_is_a_tablebase(self):
+        self.new_game(difficulty='perfect')
+        for variant in ('six_mens_morris', 'nine_mens_morris'):
+            with self.subTest(variant=variant):
+                response = self.client.post('/api/new-game', json={'variant': variant, 'difficulty': 'perfect'})
+                self.assertEqual(response.status_code, 400)
+                self.new_game(variant=variant, difficulty='master')
+
+
+class AnalyzeTest(AppTest):
+    def test_difficulty_depth_is_capped(self):
+        state = create_game(difficulty='master', human_first=True).to_dict()
+        self.assertGreater(create_game(difficulty='master').search_depth, app_module.MAX_ANALYZE_DEPTH)
+        response = self.client.post('/api/analyze', json={'states': [state]})
+        self.assertEqual(response.status_code, 200, response.text)
+        self.assertLessEqual(response.json()['results'][0]['depth'], app_module.MAX_ANALYZE_DEPTH)
+
+        response = self.client.post('/api/analyze', json={'states': [state], 'depth': app_module.MAX_ANALYZE_DEPTH + 1})
+        self.assertEqual(response.status_code, 400)
+
+
+class GameLogTest(unittest.TestCase):
+    def test_only_unfinished_games_with_moves_are_logged_when_dropped(self):
+        handle, path = tempfile.mkstemp(suffix='.log')
+        os.close(handle)
+        self.addCleanup(os.remove, path)
+        log = GameLog(path)
+        saved, app_module.game_log = app_module.game_log, log
+        self.addCleanup(setattr, app_module, 'game_log', saved)
+
+        unfinished = create_game(human_first=True)
+        unfinished.make_move(('place', 'a'))
+        finished = create_game(human_first=True)
+        for square in 'adbec':
+            finished.make_move(('place', square))
+        app_module.log_unfinished('00000000-0000-0000-0000-000000000001', unfinished)
+        app_module.log_unfinished('00000000-0000-0000-0000-000000000002', create_game(human_first=True))
+        app_module.log_unfinished('00000000-0000-0000-0000-000000000003', finished)
+        log.close()
+
+        records = list(read_records(path))
+        self.assertEqual([record.game_id for record in records], ['00000000-0000-0000-0000-000000000001'])
+        self.assertIsNone(records[0].winner)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+import unittest
+
+from benchmarks.evaluation import reachable_positions
+from bitboard import PLAYERS, PLAYER_INDEX
+from search import SCORES
+from three_mens_morris import ThreeMensMorris
+
+# The original square-by-square evaluator, kept independent of the bitboard
+# tables it is checked against
+WINNING_COMBINATIONS = [
+    ('a', 'b', 'c'), ('d', 'e', 'f'), ('g', 'h', 'i'),
+    ('a', 'd', 'g'), ('b', 'e', 'h'), ('c', 'f', 'i'),
+    ('a', 'e', 'i'), ('c', 'e', 'g')
+]
+ADJACENCY = {
+    'a': ['b', 'd', 'e'],
+    'b': ['a', 'c', 'e'],
+    'c': ['b', 'f', 'e'],
+    'd': ['a', 'e', 'g'],
+    'e': ['a', 'b', 'c', 'd', 'f', 'g', 'h', 'i'],
+    'f': ['c', 'e', 'i'],
+    'g': ['d', 'e', 'h'],
+    'h': ['e', 'g', 'i'],
+    'i': ['e', 'f', 'h']
+}
+
+
+def line_score(positions, ai_player, human_player):
+    score = 0
+    for combo in WINNING_COMBINATIONS:
+        ai_count = sum(1 for pos in combo if positions[pos] == ai_player)
+        human_count = sum(1 for pos in combo if positions[pos] == human_player)
+        empty_count = sum(1 for pos in combo if positions[pos] is None)
+
+        if human_count == 0:  # AI can potentially win this line
+            if ai_count == 2 and empty_count == 1:
+                score += 50  # One move away from winning
+            elif ai_count == 1 and empty_count == 2:
+                score += 10  # Two moves away from winning
+
+        if ai_count == 0:  # Human can potentially win this line
+            if human_count == 2 and empty_count == 1:
+                score -= 50  # Block human from winning
+            elif human_count == 1 and empty_count == 2:
+                score -= 10  # Human has potential
+
+    # Prefer center position
+    if positions['e'] == ai_player:
+        score += 5
+    elif positions['e'] == human_player:
+        score -= 5
+    return score
+
+
+def evaluate_position(positions, current_player, phase, ai_player, human_player):
+    for combo in WINNING_COMBINATIONS:
+        if positions[combo[0]] is not None and \
+           positions[combo[0]] == positions[combo[1]] == positions[combo[2]]:
+            return 1000 if positions[combo[0]] == ai_player else -1000
+
+    if phase == 'movement':
+        blocked = all(
+            positions[to] is not None
+            for frm, player in positions.items() if player == current_player
+            for to in ADJACENCY[frm]
+        )
+        if blocked:
+            return 1000 if current_player != ai_player else -1000
+
+    return line_score(positions, ai_player, human_player)
+
+
+class EvaluationTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.snapshots = reachable_positions()
+
+    def games(self):
+        """A game per reachable position and AI color"""
+        game = ThreeMensMorris(human_first=True)
+        for snapshot in self.snapshots:
+            game.board.restore(snapshot)
+            for ai_player in PLAYERS:
+                game.ai_player = ai_player
+                game.human_player = 'red' if ai_player == 'blue' else 'blue'
+                yield game
+
+    def test_score_tables_match_the_original_heuristic(self):
+        self.assertEqual(len(self.snapshots), 7740)
+        for game in self.games():
+            expected = line_score(game.positions, game.ai_player, game.human_player)
+            if SCORES[PLAYER_INDEX[game.ai_player]][game.board.index] != expected:
+                self.fail(f"{game.positions} for {game.ai_player}: "
+                          f"{SCORES[PLAYER_INDEX[game.ai_player]][game.board.index]} != {expected}")
+
+    def test_evaluate_position_matches_the_original(self):
+        for game in self.games():
+            expected = evaluate_position(game.positions, game.current_player, game.phase,
+                                         game.ai_player, game.human_player)
+            if game.evaluate_position() != expected:
+                self.fail(f"{game.positions}, {game.current_player} to move, for {game.ai_player}: "
+                          f"{game.evaluate_position()} != {expected}")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import contextlib
+import io
+import os
+import random
+import tempfile
+import unittest
+import uuid
+
+from game_log import GameLog, main, read_records, replay
+from morris import create_game
+from rules import VARIANTS
+
+
+def random_game(variant, rng, plies=30):
+    game = create_game(variant, human_first=True)
+    for _ in range(plies):
+        if game.is_game_over()[0]:
+            break
+        game.make_move(rng.choice(game.get_valid_moves(game.current_player)))
+    return game
+
+
+class ReplayCommandTest(unittest.TestCase):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix='.log')
+        os.close(handle)
+        self.addCleanup(os.remove, self.path)
+
+    def test_replays_a_logged_game_of_every_variant(self):
+        rng = random.Random(0)
+        games = {str(uuid.uuid4()): random_game(variant, rng) for variant in VARIANTS}
+        log = GameLog(self.path)
+        for game_id, game in games.items():
+            log.append_game(game_id, game, game.is_game_over()[1])
+        log.close()
+        records = {record.game_id: record for record in read_records(self.path)}
+
+        for game_id, game in games.items():
+            with self.subTest(variant=game.rules.name):
+                output = io.StringIO()
+                with contextlib.redirect_stdout(output):
+                    main([self.path, '--game', game_id])
+                expected = []
+                for ply, replayed in replay(records[game_id]):
+                    expected.append(f"Ply {ply}: {' '.join(game.history[ply - 1]) if ply else 'start'}")
+                    expected.append(replayed.render_board())
+                expected.append(f"Winner: {game.is_game_over()[1] or 'none (unfinished)'}")
+                self.assertEqual(output.getvalue(), '\n'.join(expected) + '\n')
+                self.assertTrue(output.getvalue().endswith(
+                    f"{game.render_board()}\nWinner: {game.is_game_over()[1] or 'none (unfinished)'}\n"))
+
+    def test_unknown_game(self):
+        GameLog(self.path).close()
+        with self.assertRaises(SystemExit):
+            main([self.path, '--game', str(uuid.uuid4())])
+
+
+if __name__ == '__main__':
+    unittest.main()
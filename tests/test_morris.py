@@ -0,0 +1,69 @@
+import unittest
+
+from morris import create_game
+from rules import VARIANTS
+
+# Movement phase of Nine Men's Morris, four pieces each (so neither side
+# flies): the a1-d1-g1 and a7 pieces have no empty neighbour, while the
+# other side's pieces on a4, d2, g4 and d7 can still move
+BLOCKED = ('a1', 'd1', 'g1', 'a7')
+FREE = ('a4', 'd2', 'g4', 'd7')
+
+
+def nine_mens_morris(blocked_player, to_move):
+    game = create_game('nine_mens_morris', human_first=True)
+    free_player = 'red' if blocked_player == 'blue' else 'blue'
+    positions = dict.fromkeys(game.rules.squares)
+    positions.update(dict.fromkeys(BLOCKED, blocked_player))
+    positions.update(dict.fromkeys(FREE, free_player))
+    state = game.to_dict()
+    state.update(positions=positions, current_player=to_move, pieces_placed={'blue': 9, 'red': 9})
+    game.from_dict(state)
+    return game
+
+
+class BlockedPlayerTest(unittest.TestCase):
+    def test_only_three_mens_morris_ends_when_the_mover_is_blocked(self):
+        self.assertTrue(VARIANTS['three_mens_morris'].blocked_mover_loses)
+        self.assertFalse(VARIANTS['six_mens_morris'].blocked_mover_loses)
+        self.assertFalse(VARIANTS['nine_mens_morris'].blocked_mover_loses)
+
+    def test_game_continues_when_the_player_who_just_moved_is_blocked(self):
+        game = nine_mens_morris(blocked_player='blue', to_move='red')
+        self.assertEqual(game.phase, 'movement')
+        self.assertEqual(game.is_game_over(), (False, None))
+        self.assertTrue(game.get_valid_moves('red'))
+        self.assertIsNotNone(game.get_ai_move(depth=2, time_budget=0))
+
+    def test_player_to_move_loses_when_blocked(self):
+        game = nine_mens_morris(blocked_player='red', to_move='red')
+        self.assertEqual(game.is_game_over(), (True, 'blue'))
+
+
+class DecidedPositionTest(unittest.TestCase):
+    def test_mcts_returns_a_move_when_the_game_is_already_won(self):
+        # Blue holds a-b-c while red still has a piece to place
+        game = create_game('three_mens_morris', difficulty='hard', engine='mcts', human_first=True)
+        positions = dict.fromkeys(game.rules.squares)
+        positions.update(a='blue', b='blue', c='blue', e='red', i='red')
+        state = game.to_dict()
+        state.update(positions=positions, current_player='red', pieces_placed={'blue': 3, 'red': 2})
+        game.from_dict(state)
+        self.assertIsNotNone(game.board.search_outcome())
+        self.assertIsNotNone(game.get_ai_move(time_budget=0.1))
+
+    def test_mcts_returns_a_move_when_the_mover_has_lost(self):
+        # Red has placed all nine pieces and has two left
+        game = create_game('nine_mens_morris', difficulty='hard', engine='mcts', human_first=True)
+        positions = dict.fromkeys(game.rules.squares)
+        positions.update(dict.fromkeys(('a1', 'd1', 'g1', 'd2'), 'blue'))
+        positions.update(dict.fromkeys(('a7', 'g7'), 'red'))
+        state = game.to_dict()
+        state.update(positions=positions, current_player='red', pieces_placed={'blue': 9, 'red': 9})
+        game.from_dict(state)
+        self.assertIsNotNone(game.board.search_outcome())
+        self.assertIsNotNone(game.get_ai_move(time_budget=0.1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import os
+import tempfile
+import time
+import unittest
+
+from morris import create_game
+from session_store import MemorySessionStore, SQLiteSessionStore
+
+
+def game_with_moves(*moves):
+    game = create_game(human_first=True)
+    for move in moves:
+        game.make_move(move)
+    return game
+
+
+class MemorySessionStoreTest(unittest.TestCase):
+    def test_evicted_sessions_are_passed_to_on_evict(self):
+        evicted = []
+        store = MemorySessionStore(max_sessions=2, on_evict=lambda game_id, game: evicted.append(game_id))
+        for game_id in ('a', 'b', 'c'):
+            store.save(game_id, game_with_moves())
+        self.assertEqual(evicted, ['a'])
+
+        store.ttl = 0
+        time.sleep(0.01)
+        self.assertEqual(len(store), 0)
+        self.assertEqual(evicted, ['a', 'b', 'c'])
+
+    def test_delete_does_not_call_on_evict(self):
+        evicted = []
+        store = MemorySessionStore(on_evict=lambda game_id, game: evicted.append(game_id))
+        store.save('a', game_with_moves())
+        self.assertTrue(store.delete('a'))
+        self.assertEqual(evicted, [])
+
+
+class SQLiteSessionStoreTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'sessions.db')
+
+    def test_expired_rows_are_passed_to_on_evict_with_their_history(self):
+        evicted = []
+        store = SQLiteSessionStore(self.path, ttl=60, on_evict=lambda game_id, game: evicted.append((game_id, game)))
+        self.addCleanup(store.connection.close)
+        game = game_with_moves(('place', 'a'), ('place', 'e'))
+        store.save('old', game)
+        store.save('new', game_with_moves())
+        store.connection.execute("UPDATE sessions SET updated = ? WHERE game_id = 'old'", (time.time() - 120,))
+
+        store._cleanup()
+        self.assertEqual([game_id for game_id, _ in evicted], ['old'])
+        self.assertEqual(evicted[0][1].history, game.history)
+        self.assertEqual(len(store), 1)
+        store._cleanup()
+        self.assertEqual(len(evicted), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,180 +1,111 @@
+import functools
+import os
 import random
+import time
+from concurrent.futures import ProcessPoolExecutor
 # from typing import Dict, List, Tuple, Optional
+from bitboard import BLUE, MOVE_MASKS, MOVE_TUPLES, PLAYERS, PLAYER_INDEX, RED, SQUARE_BITS, BitBoard
+from game_base import BaseGame
+from mcts import MCTS
+from opening_book import get_opening_book
+from rules import RULES
+from search import SCORES, WIN_SCORE, Search
+from symmetry import INVERSE, canonicalize, shared_cache, transform_move
+from tablebase import WIN, get_tablebase
+from transposition import shared_table
 
 
-class ThreeMensMorris:
-    def __init__(self, difficulty='medium', human_first=None):
-        self.positions = {k: None for k in 'abcdefghi'}
-        self.adjacency = {
-            'a': ['b', 'd', 'e'],
-            'b': ['a', 'c', 'e'],
-            'c': ['b', 'f', 'e'],
-            'd': ['a', 'e', 'g'],
-            'e': ['a', 'b', 'c', 'd', 'f', 'g', 'h', 'i'],
-            'f': ['c', 'e', 'i'],
-            'g': ['d', 'e', 'h'],
-            'h': ['e', 'g', 'i'],
-            'i': ['e', 'f', 'h']
-        }
+class ThreeMensMorris(BaseGame):
+    # Only per-game state lives on instances; the rules are shared by every game
+    __slots__ = ('book_variety', 'transposition_table', 'position_cache')
 
-        self.phase = 'placement'  # 'placement' or 'movement'
-        
-        # Randomly decide who goes first if not specified
-        if human_first is None:
-            human_first = random.choice([True, False])
-        
-        self.human_player = 'blue'  # Blue for human
-        self.ai_player = 'red'      # Red for AI
-        self.current_player = self.human_player if human_first else self.ai_player
-        self.pieces_placed = {'blue': 0, 'red': 0}
-        self.max_pieces = 3
-        
-        # Difficulty levels with different search depths
-        self.difficulty_depths = {
-            'easy': 1,
-            'medium': 2,
-            'hard': 3,
-            'expert': 5
-        }
-        self.difficulty = difficulty
-        self.search_depth = self.difficulty_depths.get(difficulty, 4)
+    rules = RULES
+    adjacency = RULES.adjacency
+    max_pieces = RULES.max_pieces
+    square_bits = SQUARE_BITS
+    difficulty_depths = RULES.difficulty_depths
+    difficulty_time_budgets = RULES.difficulty_time_budgets
+    difficulty_iterations = RULES.difficulty_iterations
+
+    def __init__(self, difficulty='medium', human_first=None, transposition_table=None,
+                 position_cache=None, time_budget=None, book_variety=False, engine='minimax', tree_cache=None):
+        # Scores are from the AI's point of view, so sessions only share
+        # table entries with other sessions whose AI plays the same color
+        self.transposition_table = transposition_table if transposition_table is not None else shared_table
+        # Root results keyed by symmetry-canonical position, shared the same way
+        self.position_cache = position_cache if position_cache is not None else shared_cache
+        # Pick randomly among equally good opening book replies instead of the first
+        self.book_variety = book_variety
+        super().__init__(difficulty, human_first, time_budget, engine, tree_cache)
+
+    def _new_board(self, turn):
+        return BitBoard(turn)
 
     def check_winner(self):
-        winning_combinations = [
-            ('a', 'b', 'c'),
-            ('d', 'e', 'f'),
-            ('g', 'h', 'i'),
-            ('a', 'd', 'g'),
-            ('b', 'e', 'h'),
-            ('c', 'f', 'i'),
-            ('a', 'e', 'i'),
-            ('c', 'e', 'g')
-        ]
-        for combo in winning_combinations:
-            if self.positions[combo[0]] is not None and \
-               self.positions[combo[0]] == self.positions[combo[1]] == self.positions[combo[2]]:
-                return self.positions[combo[0]]
-        return None
-    
+        winner = self.board.winner()
+        return None if winner is None else PLAYERS[winner]
+
     def is_game_over(self):
         winner = self.check_winner()
         if winner:
             return True, winner
-        
+
         # Check if current player has any valid moves in movement phase
-        if self.phase == 'movement':
-            valid_moves = self.get_valid_moves(self.current_player)
-            if not valid_moves:
+        if self.board.movement:
+            if not self.board.can_move(self.board.turn):
                 # Current player has no moves, opponent wins
-                opponent = 'red' if self.current_player == 'blue' else 'blue'
-                return True, opponent
-        
+                return True, PLAYERS[self.board.turn ^ 1]
+
         return False, None
-    
+
 
     def place_piece(self, position):
-        if self.phase != 'placement':
+        board = self.board
+        if board.movement:
             raise Exception("Cannot place piece during movement phase.")
-        if self.positions[position] is not None:
+        if board.occupied & SQUARE_BITS[position]:
             raise Exception(f"Position {position} is already occupied.")
-        
-        self.positions[position] = self.current_player
-        self.pieces_placed[self.current_player] += 1
-        
-        # Check if placement phase is over
-        if self.pieces_placed['blue'] == self.max_pieces and self.pieces_placed['red'] == self.max_pieces:
-            self.phase = 'movement'
-        
+
+        board.toggle(board.turn, SQUARE_BITS[position])
+        board.placed[board.turn] += 1
+        self._record(MOVE_TUPLES[0, SQUARE_BITS[position]])
+
         game_over, winner = self.is_game_over()
         if game_over:
             return f"Player {winner} wins!"
-        
-        self.current_player = 'red' if self.current_player == 'blue' else 'blue'
+
+        board.turn ^= 1
         return "Piece placed successfully."
-    
+
     def move_piece(self, from_position, to_position):
-        if self.phase != 'movement':
+        board = self.board
+        if not board.movement:
             raise Exception("Cannot move piece during placement phase.")
-        if self.positions[from_position] != self.current_player:
+        if not board.pieces[board.turn] & SQUARE_BITS[from_position]:
             raise Exception(f"Cannot move piece from {from_position} as it is not your piece.")
-        if self.positions[to_position] is not None:
+        if board.occupied & SQUARE_BITS[to_position]:
             raise Exception(f"Position {to_position} is already occupied.")
         if to_position not in self.adjacency[from_position]:
             raise Exception(f"Cannot move to {to_position} from {from_position}.")
-        
-        self.positions[to_position] = self.current_player
-        self.positions[from_position] = None
-        
+
+        board.toggle(board.turn, SQUARE_BITS[from_position] | SQUARE_BITS[to_position])
+        self._record(MOVE_TUPLES[SQUARE_BITS[from_position], SQUARE_BITS[to_position]])
+
         game_over, winner = self.is_game_over()
         if game_over:
             return f"Player {winner} wins!"
-        
-        self.current_player = 'red' if self.current_player == 'blue' else 'blue'
+
+        board.turn ^= 1
         return "Piece moved successfully."
-    
 
-    def render_board(self):
-        board = ""
-        rows = ['abc', 'def', 'ghi']
-        connectors = ['| \\ | / |', '| / | \\ |']
-        for i, row in enumerate(rows):
-            row_str = ""
-            for j, each in enumerate(row):
-                row_str += (self.positions[each] if self.positions[each] is not None else '.')
-                if j < 2:
-                    row_str += "---"
-            board += row_str + "\n"
-            if i < 2:
-                board += connectors[i] + "\n"
-        print(board)
-        return board.strip()
-    
     def get_valid_moves(self, player):
         """Get all valid moves for a player"""
-        valid_moves = []
-        
-        if self.phase == 'placement':
-            # In placement phase, any empty position is valid
-            for pos in 'abcdefghi':
-                if self.positions[pos] is None:
-                    valid_moves.append(('place', pos))
-        else:
-            # In movement phase, find all valid moves
-            for pos in 'abcdefghi':
-                if self.positions[pos] == player:
-                    for adjacent in self.adjacency[pos]:
-                        if self.positions[adjacent] is None:
-                            valid_moves.append(('move', pos, adjacent))
-        
-        return valid_moves
-    
-    def make_move(self, move):
-        """Make a move and return the previous state for undo"""
-        prev_state = {
-            'positions': self.positions.copy(),
-            'current_player': self.current_player,
-            'phase': self.phase,
-            'pieces_placed': self.pieces_placed.copy()
-        }
-        
-        if move[0] == 'place':
-            self.place_piece(move[1])
-        else:  # move
-            self.move_piece(move[1], move[2])
-        
-        return prev_state
-    
-    def undo_move(self, prev_state):
-        """Undo a move by restoring previous state"""
-        self.positions = prev_state['positions']
-        self.current_player = prev_state['current_player']
-        self.phase = prev_state['phase']
-        self.pieces_placed = prev_state['pieces_placed']
-    
+        return [MOVE_TUPLES[move] for move in self.board.moves(PLAYER_INDEX[player])]
+
     def evaluate_position(self):
         """Evaluate the current position for the AI"""
         game_over, winner = self.is_game_over()
-        
+
         if game_over:
             if winner == self.ai_player:
                 return 1000
@@ -182,130 +113,222 @@ class ThreeMensMorris:
                 return -1000
             else:
                 return 0
-        
-        score = 0
-        
-        # Check for potential winning lines
-        winning_combinations = [
-            ('a', 'b', 'c'), ('d', 'e', 'f'), ('g', 'h', 'i'),
-            ('a', 'd', 'g'), ('b', 'e', 'h'), ('c', 'f', 'i'),
-            ('a', 'e', 'i'), ('c', 'e', 'g')
-        ]
-        
-        for combo in winning_combinations:
-            ai_count = sum(1 for pos in combo if self.positions[pos] == self.ai_player)
-            human_count = sum(1 for pos in combo if self.positions[pos] == self.human_player)
-            empty_count = sum(1 for pos in combo if self.positions[pos] is None)
-            
-            if human_count == 0:  # AI can potentially win this line
-                if ai_count == 2 and empty_count == 1:
-                    score += 50  # One move away from winning
-                elif ai_count == 1 and empty_count == 2:
-                    score += 10  # Two moves away from winning
-            
-            if ai_count == 0:  # Human can potentially win this line
-                if human_count == 2 and empty_count == 1:
-                    score -= 50  # Block human from winning
-                elif human_count == 1 and empty_count == 2:
-                    score -= 10  # Human has potential
-        
-        # Prefer center position
-        if self.positions['e'] == self.ai_player:
-            score += 5
-        elif self.positions['e'] == self.human_player:
-            score -= 5
-        
-        return score
-    
+
+        return self._heuristic()
+
+    def _heuristic(self):
+        """Line and center score of a non-terminal position for the AI"""
+        return SCORES[PLAYER_INDEX[self.ai_player]][self.board.index]
+
     def minimax(self, depth, maximizing_player, alpha, beta):
         """Minimax algorithm with alpha-beta pruning"""
-        game_over, _ = self.is_game_over()
-        
-        if game_over or depth == 0:
-            return self.evaluate_position()
-        
-        valid_moves = self.get_valid_moves(self.current_player)
-        
-        if maximizing_player:
-            max_eval = float('-inf')
-            for move in valid_moves:
-                prev_state = self.make_move(move)
-                eval_score = self.minimax(depth - 1, False, alpha, beta)
-                self.undo_move(prev_state)
-                max_eval = max(max_eval, eval_score)
-                alpha = max(alpha, eval_score)
-                if beta <= alpha:
-                    break  # Alpha-beta pruning
-            return max_eval
-        else:
-            min_eval = float('inf')
-            for move in valid_moves:
-                prev_state = self.make_move(move)
-                eval_score = self.minimax(depth - 1, True, alpha, beta)
-                self.undo_move(prev_state)
-                min_eval = min(min_eval, eval_score)
-                beta = min(beta, eval_score)
-                if beta <= alpha:
-                    break  # Alpha-beta pruning
-            return min_eval
-    
-    def get_ai_move(self, depth=None):
-        """Get the best move for AI using minimax with alpha-beta pruning"""
+        search = Search(self.board, PLAYER_INDEX[self.ai_player], self.transposition_table)
+        return search.minimax(depth, maximizing_player, alpha, beta)
+
+    def get_ai_move(self, depth=None, time_budget=None, stats=None, root_search=None, iterations=None):
+        """Get the best move for AI using iterative deepening alpha-beta search.
+
+        `time_budget` is in seconds and defaults to the game's budget; 0 means no limit.
+        If a `stats` dict is given it is filled with how the move was chosen
+        ('source': random, tablebase, book, cache or search), the nodes visited, leaf
+        evaluations, alpha-beta cutoffs, transposition table hits, the depth
+        reached and the wall time in seconds.
+        A parallel_search.ParallelRootSearch given as `root_search` splits
+        searches of at least its min_depth across its worker processes.
+        With engine 'mcts' a move not found in the tablebase or opening book
+        comes from a Monte Carlo tree search of `iterations` leaves (default
+        per difficulty) within the time budget instead, with source 'mcts';
+        `root_search` is unused.
+        """
+        start = time.perf_counter()
         if depth is None:
             depth = self.search_depth
-            
-        valid_moves = self.get_valid_moves(self.ai_player)
-        
+        if time_budget is None:
+            time_budget = self.time_budget
+
+        board = self.board
+        ai = PLAYER_INDEX[self.ai_player]
+        valid_moves = board.moves(ai)
+
         if not valid_moves:
             return None
-        
+
         # Add some randomness for easy mode
         if self.difficulty == 'easy' and random.random() < 0.3:
-            return random.choice(valid_moves)
-        
-        best_move = None
-        best_score = float('-inf')
-        
-        for move in valid_moves:
-            prev_state = self.make_move(move)
-            score = self.minimax(depth - 1, False, float('-inf'), float('inf'))
-            self.undo_move(prev_state)
-            
-            if score > best_score:
-                best_score = score
-                best_move = move
-        
-        return best_move
-    
-    def to_dict(self):
-        """Convert game state to dictionary for JSON serialization"""
+            _fill_stats(stats, 'random', start)
+            return MOVE_TUPLES[random.choice(valid_moves)]
+
+        # Perfect play, or a forced win inside the search horizon, needs no search
+        if board.turn == ai:
+            tablebase = get_tablebase()
+            entry = tablebase.probe(board)
+            if entry is not None and (self.difficulty == 'perfect' or
+                                      (entry[0] == WIN and entry[1] <= depth)):
+                _fill_stats(stats, 'tablebase', start)
+                return MOVE_TUPLES[tablebase.best_move(board, lambda child: self._heuristic())]
+
+            # Placement-phase replies are precomputed at every difficulty's depth
+            replies = get_opening_book().moves(board, depth)
+            if replies:
+                _fill_stats(stats, 'book', start, depth=depth)
+                return MOVE_TUPLES[random.choice(replies) if self.book_variety else replies[0]]
+
+        deadline = start + time_budget if time_budget else None
+        # A decided root has no children for MCTS to choose from; the search still returns a move
+        if self.engine == 'mcts' and board.search_outcome() is None:
+            search = MCTS(board, self.tree_cache, playouts=16, batch=32, simulate=_batched_playouts())
+            best_move = search.run(iterations or self.difficulty_iterations.get(self.difficulty, 512), deadline)
+            _fill_mcts_stats(stats, start, search)
+            return MOVE_TUPLES[best_move]
+
+        cached = self.position_cache.get(board, ai, depth)
+        if cached is not None:
+            _fill_stats(stats, 'cache', start, depth=depth)
+            return MOVE_TUPLES[cached[0]]
+
+        if root_search is not None and depth >= root_search.min_depth:
+            best_move, best_score, reached, search = root_search.iterate(board, ai, valid_moves, depth, deadline)
+            table_hits = search.table_hits
+        else:
+            table_hits = self.transposition_table.hits
+            search = Search(board, ai, self.transposition_table, deadline)
+            best_move, best_score, reached = search.iterate(valid_moves, depth)
+            table_hits = self.transposition_table.hits - table_hits
+
+        # Only a full-depth (or proven) result is what a fresh search would return
+        if reached == depth or abs(best_score) >= WIN_SCORE:
+            self.position_cache.put(board, ai, depth, best_move, best_score)
+        _fill_stats(stats, 'search', start, search, reached, table_hits)
+        return MOVE_TUPLES[best_move]
+
+    def analyze(self, depth=None, time_budget=0):
+        """Best move, score and principal variation for the player to move.
+
+        Unlike get_ai_move this never plays randomly or consults the
+        tablebase, and the score is from the point of view of the player to move.
+        """
+        if depth is None:
+            depth = self.search_depth
+
+        board = self.board
+        game_over, winner = self.is_game_over()
+        if game_over:
+            score = WIN_SCORE if winner == self.current_player else -WIN_SCORE
+            return {'best_move': None, 'score': score, 'depth': 0, 'pv': []}
+
+        deadline = time.perf_counter() + time_budget if time_budget else None
+        search = Search(board, board.turn, self.transposition_table, deadline)
+        valid_moves = board.moves(board.turn)
+        best_move, best_score, reached = search.iterate(valid_moves, depth)
         return {
-            'positions': self.positions,
-            'phase': self.phase,
-            'current_player': self.current_player,
-            'pieces_placed': self.pieces_placed,
-            'difficulty': self.difficulty,
-            'human_player': self.human_player,
-            'ai_player': self.ai_player
+            'best_move': MOVE_TUPLES[best_move],
+            'score': best_score,
+            'depth': reached,
+            'pv': [MOVE_TUPLES[move] for move in search.principal_variation(best_move, reached)]
         }
-    
+
+    def to_dict(self, include_history=False):
+        state = super().to_dict(include_history)
+        state['book_variety'] = self.book_variety
+        return state
+
     def from_dict(self, data):
-        """Restore game state from dictionary"""
-        self.positions = data['positions']
-        self.phase = data['phase']
-        self.current_player = data['current_player']
-        self.pieces_placed = data['pieces_placed']
-        self.difficulty = data['difficulty']
-        self.human_player = data['human_player']
-        self.ai_player = data['ai_player']
-        self.search_depth = self.difficulty_depths.get(self.difficulty, 4)
-    
+        super().from_dict(data)
+        self.book_variety = data.get('book_variety', False)
+        # Share the move tuples of MOVE_TUPLES rather than a copy per game
+        self.history = [MOVE_TUPLES[MOVE_MASKS[move]] for move in self.history]
+
+
+def _fill_stats(stats, source, start, search=None, depth=0, table_hits=0):
+    if stats is None:
+        return
+    stats.update(
+        source=source,
+        nodes=search.nodes if search else 0,
+        leaves=search.leaves if search else 0,
+        cutoffs=search.cutoffs if search else 0,
+        table_hits=table_hits,
+        depth=depth,
+        seconds=time.perf_counter() - start
+    )
+
+
+def _fill_mcts_stats(stats, start, search):
+    _fill_stats(stats, 'mcts', start, search, search.depth)
+    if stats is not None:
+        stats.update(iterations=search.iterations, reused=search.reused)
+
+
+def _batched_playouts():
+    # NumPy is only loaded once a game uses MCTS
+    import numpy as np
+    from vectorized import random_playouts
+
+    return functools.partial(random_playouts, rng=np.random.default_rng(random.getrandbits(64)))
+
+
+def _analyze_canonical(args):
+    blue, red, turn, placed_blue, placed_red, depth = args
+    game = ThreeMensMorris(human_first=True)
+    game.board.restore((blue, red, turn, placed_blue, placed_red))
+    return game.analyze(depth=depth)
+
+
+def analyze_positions(states, depth=None, workers=None, executor=None, max_depth=None):
+    """Analyze many to_dict game states, returning one ThreeMensMorris.analyze result per state.
+
+    States are searched to `depth`, or else to their difficulty's depth,
+    capped at `max_depth` when given. Identical and symmetric positions are
+    searched once, and the unique ones are spread over a process pool
+    (`executor`, or a new one with `workers` processes; `workers=0` analyzes
+    in this process).
+    """
+    keys = []
+    transforms = []
+    unique = {}
+    for state in states:
+        game = ThreeMensMorris(human_first=True)
+        game.from_dict(state)
+        board = game.board
+        blue, red, t = canonicalize(board.pieces[BLUE], board.pieces[RED])
+        state_depth = depth if depth is not None else game.search_depth
+        if max_depth is not None:
+            state_depth = min(state_depth, max_depth)
+        key = (blue, red, board.turn, board.placed[BLUE], board.placed[RED], state_depth)
+        unique.setdefault(key, len(unique))
+        keys.append(key)
+        transforms.append(t)
+
+    jobs = list(unique)
+    if workers == 0 or (executor is None and len(jobs) < 64):
+        results = [_analyze_canonical(job) for job in jobs]
+    elif executor is not None:
+        results = list(executor.map(_analyze_canonical, jobs, chunksize=max(1, len(jobs) // 64)))
+    else:
+        workers = workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_analyze_canonical, jobs, chunksize=max(1, len(jobs) // (4 * workers))))
+
+    def restore_orientation(move, t):
+        return MOVE_TUPLES[transform_move(MOVE_MASKS[move], INVERSE[t])]
+
+    analyses = []
+    for key, t in zip(keys, transforms):
+        result = results[unique[key]]
+        analyses.append({
+            'best_move': restore_orientation(result['best_move'], t) if result['best_move'] else None,
+            'score': result['score'],
+            'depth': result['depth'],
+            'pv': [restore_orientation(move, t) for move in result['pv']]
+        })
+    return analyses
+
 
 def play_game():
     """Main game loop for human vs AI"""
     game = ThreeMensMorris()
     print("Welcome to Three Men's Morris!")
-    print("You are X, AI is O")
+    print("You are B (blue), AI is R (red)")
     print("Positions are labeled a-i:")
     print("a---b---c")
     print("| \\ | / |")
@@ -315,7 +338,8 @@ def play_game():
     print()
     
     while True:
-        game.render_board()
+        print(game.render_board())
+        print()
         print(f"Current phase: {game.phase}")
         print(f"Current player: {game.current_player}")
         
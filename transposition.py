@@ -0,0 +1,47 @@
+"""Bounded transposition table shared by every game in the process"""
+from collections import OrderedDict
+
+EXACT, LOWER, UPPER = 0, 1, 2
+
+
+class TranspositionTable:
+    """Zobrist-keyed store of (score, bound, best_move) with LRU eviction.
+
+    Entries are keyed by remaining depth as well as position so that a
+    shallow difficulty never reuses a deeper search's score and plays
+    stronger (or differently) than its fixed-depth search would.
+    """
+
+    def __init__(self, max_entries=200_000):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key, depth):
+        entry = self.entries.get((key, depth))
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end((key, depth))
+        return entry
+
+    def store(self, key, depth, score, bound, best_move):
+        self.entries[key, depth] = (score, bound, best_move)
+        self.entries.move_to_end((key, depth))
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+# Default table used by ThreeMensMorris instances, so positions repeated across
+# different sessions in app.py are only searched once
+shared_table = TranspositionTable()
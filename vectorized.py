@@ -0,0 +1,208 @@
+"""NumPy evaluation of many positions at once.
+
+Boards are (N, 9) integer arrays of cells in 'abcdefghi' order holding 0 for
+empty, 1 for blue and 2 for red, which are also the base-3 digits of
+BitBoard.index. Pieces are never removed, so the pieces on a board are its
+placement counters and both sides having three means the movement phase.
+"""
+import numpy as np
+
+from bitboard import ADJACENT_MASKS, BLUE, FULL_BOARD, HAS_MILL, MAX_PIECES, MOVE_TUPLES, POPCOUNT, RED, SQUARES, \
+    WIN_MASKS
+from search import WIN_SCORE
+
+# Piece sets are handled as 9-bit masks, as in BitBoard
+SQUARE_VALUES = (1 << np.arange(len(SQUARES))).astype(np.int16)
+LINE_MASKS = np.array(WIN_MASKS, dtype=np.int16)
+POPCOUNTS = np.array(POPCOUNT, dtype=np.int8)
+# REACH[bits] is every square adjacent to a piece in `bits`
+REACH = np.array([
+    np.bitwise_or.reduce([ADJACENT_MASKS[i] for i in range(len(SQUARES)) if bits >> i & 1] or [0])
+    for bits in range(FULL_BOARD + 1)
+], dtype=np.int16)
+CENTER_INDEX = SQUARES.index('e')
+POWERS = 3 ** np.arange(len(SQUARES))
+
+# A line is keyed by blue_count + 4 * red_count; LINE_SCORES[key] is its value
+# for blue, and lines held only by one side are worth 10 for one piece, 50 for two
+_VALUES = (0, 10, 50, 0)
+LINE_SCORES = np.array([
+    (_VALUES[key % 4] if key // 4 == 0 else 0) - (_VALUES[key // 4] if key % 4 == 0 else 0)
+    for key in range(16)
+], dtype=np.int16)
+BLUE_MILL, RED_MILL = 3, 12
+# Center bonus for blue by the center cell's contents
+CENTER_SCORES = np.array([0, 5, -5], dtype=np.int16)
+
+# Square indices each engine move empties and fills; placements empty nothing (-1)
+_MOVE_SQUARES = {
+    move: (SQUARES.index(squares[1]) if squares[0] == 'move' else -1, SQUARES.index(squares[-1]))
+    for move, squares in MOVE_TUPLES.items()
+}
+
+
+def cells_from_indices(indices):
+    """(N, 9) cells for an array of BitBoard.index values"""
+    return (np.asarray(indices)[:, None] // POWERS % 3).astype(np.int8)
+
+
+def encode(boards):
+    """(N, 9) cells for a sequence of BitBoards"""
+    return cells_from_indices(np.fromiter((board.index for board in boards), dtype=np.int64))
+
+
+def piece_masks(cells):
+    """(blue, red): (N,) 9-bit piece sets"""
+    return (cells == 1) @ SQUARE_VALUES, (cells == 2) @ SQUARE_VALUES
+
+
+def line_keys(cells):
+    """(N, 8) blue_count + 4 * red_count for every winning line"""
+    blue, red = piece_masks(cells)
+    return _line_keys(blue, red)
+
+
+def _line_keys(blue, red):
+    return POPCOUNTS[blue[:, None] & LINE_MASKS] + 4 * POPCOUNTS[red[:, None] & LINE_MASKS]
+
+
+def _winners(keys):
+    return np.where((keys == BLUE_MILL).any(axis=1), BLUE, np.where((keys == RED_MILL).any(axis=1), RED, -1))
+
+
+def winners(cells):
+    """(N,) index of the player owning a complete line, blue first as BitBoard.winner, or -1"""
+    return _winners(line_keys(cells))
+
+
+def _heuristic(keys, cells, ai):
+    blue_scores = LINE_SCORES[keys].sum(axis=1, dtype=np.int16) + CENTER_SCORES[cells[:, CENTER_INDEX]]
+    # The score is antisymmetric in the two sides
+    return blue_scores if ai == BLUE else -blue_scores
+
+
+def heuristic(cells, ai):
+    """(N,) line and center score for `ai`, equal to search.heuristic for each board"""
+    return _heuristic(line_keys(cells), cells, ai)
+
+
+class _Batch:
+    """Piece sets, line keys and winners of N boards, each computed once"""
+
+    def __init__(self, cells):
+        self.cells = cells
+        self.blue, self.red = piece_masks(cells)
+        self.keys = _line_keys(self.blue, self.red)
+        self.winner = _winners(self.keys)
+        self.empty = FULL_BOARD ^ (self.blue | self.red)
+        # Pieces are never removed, so three each means both have placed them all
+        self.movement = (self.winner < 0) & (POPCOUNTS[self.blue] == 3) & (POPCOUNTS[self.red] == 3)
+
+    def can_move(self, player):
+        return REACH[np.where(player == BLUE, self.blue, self.red)] & self.empty != 0
+
+    def scores(self, winner, ai):
+        heuristic = _heuristic(self.keys, self.cells, ai)
+        return np.where(winner < 0, heuristic, np.where(winner == ai, WIN_SCORE, -WIN_SCORE))
+
+
+def can_move(cells, player):
+    """(N,) True where `player` (scalar or (N,) array) has a sliding move"""
+    return _Batch(cells).can_move(np.asarray(player))
+
+
+def evaluate(cells, turn, ai):
+    """(N,) ThreeMensMorris.evaluate_position for `ai` with `turn` (scalar or (N,)) to move"""
+    batch = _Batch(cells)
+    turn = np.broadcast_to(turn, batch.winner.shape)
+    stuck = batch.movement & ~batch.can_move(turn)
+    return batch.scores(np.where(stuck, turn ^ 1, batch.winner), ai)
+
+
+def _outcomes(batch, turn):
+    turn = np.broadcast_to(turn, batch.winner.shape)
+    # The side that just moved may have blocked itself in
+    mover_stuck = batch.movement & ~batch.can_move(turn ^ 1)
+    turn_stuck = batch.movement & ~mover_stuck & ~batch.can_move(turn)
+    return np.where(mover_stuck, turn, np.where(turn_stuck, turn ^ 1, batch.winner))
+
+
+def outcomes(cells, turn):
+    """(N,) BitBoard.search_outcome for positions reached by a move, with `turn` to move, or -1"""
+    return _outcomes(_Batch(cells), turn)
+
+
+def score_children(board, ai):
+    """(moves, scores): every move for the side to move and its depth-0 search score for `ai`.
+
+    Children are built and scored in one batch; the scores equal
+    Search.minimax(0, ...) after pushing each move.
+    """
+    moves = board.moves(board.turn)
+    squares = np.array([_MOVE_SQUARES[move] for move in moves]).reshape(-1, 2)
+    cells = np.repeat(cells_from_indices([board.index]), len(moves), axis=0)
+    rows = np.arange(len(moves))
+    steps = squares[:, 0] >= 0
+    cells[rows[steps], squares[steps, 0]] = 0
+    cells[rows, squares[:, 1]] = board.turn + 1
+
+    batch = _Batch(cells)
+    return moves, batch.scores(_outcomes(batch, board.turn ^ 1), ai)
+
+
+# Every engine move as from and to masks; placements have from 0
+_FROM_MASKS = np.array([move[0] for move in MOVE_TUPLES], dtype=np.int16)
+_TO_MASKS = np.array([move[1] for move in MOVE_TUPLES], dtype=np.int16)
+_PLACEMENTS = _FROM_MASKS == 0
+HAS_MILLS = np.array(HAS_MILL)
+
+
+def random_playouts(snapshots, count, max_plies=60, rng=None):
+    """(len(snapshots), 3) blue wins, red wins and draws of `count` random games from each BitBoard snapshot.
+
+    Every game picks uniformly among the legal moves, as random play with
+    BitBoard.moves does, and ends by BitBoard.search_outcome; games still
+    running after `max_plies` plies are draws. All games advance together,
+    one NumPy step per ply, and finished games drop out of the batch.
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    start = np.repeat(np.array(snapshots, dtype=np.int16).reshape(-1, 5), count, axis=0)
+    pieces = start[:, :2].copy()
+    turn = start[:, 2].copy()
+    placed = start[:, 3:].copy()
+    winners = np.full(len(start), -1, dtype=np.int8)
+    active = np.arange(len(start))
+
+    for _ in range(max_plies):
+        if not len(active):
+            break
+        rows = np.arange(len(active))
+        side = turn[active]
+        both = pieces[active]
+        own = both[rows, side]
+        empty = FULL_BOARD ^ (both[:, 0] | both[:, 1])
+        placing = placed[active, side] < MAX_PIECES
+
+        # A random legal move per game: the legal move with the highest random key
+        legal = (empty[:, None] & _TO_MASKS != 0) & np.where(
+            _PLACEMENTS, placing[:, None], ~placing[:, None] & (own[:, None] & _FROM_MASKS != 0))
+        pick = np.argmax(np.where(legal, rng.random(legal.shape), -1.0), axis=1)
+        pieces[active, side] = own ^ (_FROM_MASKS[pick] | _TO_MASKS[pick])
+        placed[active, side] += _PLACEMENTS[pick]
+        side ^= 1
+        turn[active] = side
+
+        # Same order of checks as BitBoard.search_outcome
+        blue, red = pieces[active, 0], pieces[active, 1]
+        empty = FULL_BOARD ^ (blue | red)
+        movement = (placed[active, 0] == MAX_PIECES) & (placed[active, 1] == MAX_PIECES)
+        mover_stuck = movement & (REACH[np.where(side == BLUE, red, blue)] & empty == 0)
+        side_stuck = movement & (REACH[np.where(side == BLUE, blue, red)] & empty == 0)
+        outcome = np.where(HAS_MILLS[blue], BLUE, np.where(HAS_MILLS[red], RED, np.where(
+            mover_stuck, side, np.where(side_stuck, side ^ 1, -1))))
+        done = outcome >= 0
+        winners[active[done]] = outcome[done]
+        active = active[~done]
+
+    winners = winners.reshape(-1, count)
+    return np.stack([(winners == BLUE).sum(axis=1), (winners == RED).sum(axis=1), (winners < 0).sum(axis=1)], axis=1)
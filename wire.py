@@ -0,0 +1,66 @@
+"""Compact wire format for game states, encoded without pydantic.
+
+A compact state is a small JSON object:
+
+    {"id": game id, "ply": moves played so far,
+     "board": one character per square in rules.squares order ('.' empty, 'b' blue, 'r' red)
+        or, when the client sent the ply it already has as `since`,
+     "changes": {square: character} for only the squares moved on since then,
+     "turn": 'b' or 'r', "phase": 'p' (placement) or 'm' (movement),
+     "placed": [blue, red] pieces placed, "legal": the human's legal moves,
+     "message": text, "over": whether the game has ended, "winner": 'b', 'r' or null}
+
+Legal moves list their squares in order, concatenated ("e", "ae") on boards
+with single-letter square names and space-separated ("a1 d1 g7") otherwise,
+with the captured square last. They are only listed on the human's turn.
+"""
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+CHARS = {None: '.', 'blue': 'b', 'red': 'r'}
+
+# Per variant name, the separator between a move's squares
+_separators = {}
+
+
+def _separator(rules):
+    separator = _separators.get(rules.name)
+    if separator is None:
+        separator = _separators[rules.name] = '' if all(len(sq) == 1 for sq in rules.squares) else ' '
+    return separator
+
+
+def legal_moves(game):
+    """The human's legal moves in wire form, or [] when it is not their turn"""
+    if game.current_player != game.human_player or game.is_game_over()[0]:
+        return []
+    join = _separator(game.rules).join
+    return [join(move[1:]) for move in game.get_valid_moves(game.human_player)]
+
+
+def compact_state(game_id, game, message, game_over, winner, since=None):
+    """Compact state of `game`, with only the changes after ply `since` when that is known"""
+    positions = game.positions
+    history = game.history
+    state = {'id': game_id, 'ply': len(history)}
+    if since is None or not 0 <= since <= len(history):
+        state['board'] = ''.join([CHARS[positions[sq]] for sq in game.rules.squares])
+    else:
+        state['changes'] = {sq: CHARS[positions[sq]] for move in history[since:] for sq in move[1:]}
+    placed = game.pieces_placed
+    state.update(
+        turn=CHARS[game.current_player], phase=game.phase[0], placed=[placed['blue'], placed['red']],
+        legal=legal_moves(game), message=message, over=game_over, winner=CHARS[winner] if winner else None
+    )
+    return state
+
+
+def dumps(content):
+    """UTF-8 JSON bytes of `content`, with orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, separators=(',', ':')).encode()